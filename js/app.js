@@ -3,141 +3,12 @@
   if (window.__ORANJE_APP_RUNNING__) return;
   window.__ORANJE_APP_RUNNING__ = true;
 
-  // =============================
-  // TheSportsDB (via webpack proxy)
-  // =============================
-  const TSDB_KEY = "123"; // free key
-  const TSDB_BASE = `/tsdb/api/v1/json/${TSDB_KEY}`; // <-- gaat via proxy, dus geen CORS
-  const TSDB_CACHE_KEY = "tsdbTeamBadgeCache_v2";
+  // Club badges (TheSportsDB) worden nu tijdens de build opgehaald door
+  // generate_data.py en zitten al in clubLogo → de browser doet geen lookups meer.
 
   // Zet dit bestand in: /img/club-default.png  (anders krijg je 404)
   const FALLBACK_BADGE = "/img/club-default.png";
 
-  function loadTsdbCache() {
-    try {
-      return JSON.parse(localStorage.getItem(TSDB_CACHE_KEY) || "{}");
-    } catch {
-      return {};
-    }
-  }
-  function saveTsdbCache(cache) {
-    try {
-      localStorage.setItem(TSDB_CACHE_KEY, JSON.stringify(cache));
-    } catch {}
-  }
-
-  // alias map: TSDB team naming is soms anders
-  const TSDB_ALIASES = {
-    Groningen: "FC Groningen",
-    "Inter Milan": "Inter",
-    Milan: "AC Milan",
-    Roma: "AS Roma",
-    Lyon: "Olympique Lyonnais",
-    "Newcastle United": "Newcastle",
-    "Manchester United": "Man United",
-    "Atlético Madrid": "Atletico Madrid",
-    "Paris Saint-Germain": "Paris SG",
-    "Fenerbahçe": "Fenerbahce",
-  };
-
-  const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
-
-  async function fetchTeamFromTSDB(teamName) {
-    const t = encodeURIComponent(teamName);
-    const url = `${TSDB_BASE}/searchteams.php?t=${t}`;
-
-    const res = await fetch(url, { cache: "no-store" });
-    if (!res.ok) return null;
-
-    // Soms krijg je HTML terug als proxy stuk is; guard:
-    const ct = res.headers.get("content-type") || "";
-    if (!ct.includes("application/json")) return null;
-
-    const json = await res.json();
-    return json?.teams?.[0] || null;
-  }
-
-  function pickBadge(team) {
-    // TSDB velden verschillen soms, dus pak de beste die beschikbaar is
-    return (
-      team?.strTeamBadge ||
-      team?.strBadge ||
-      team?.strTeamLogo ||
-      team?.strLogo ||
-      null
-    );
-  }
-
-  async function resolveBadge(teamName, cache) {
-    if (!teamName) return null;
-
-    // cache hit
-    if (cache[teamName]) return cache[teamName];
-
-    // 1) direct
-    let team = await fetchTeamFromTSDB(teamName);
-    let badge = pickBadge(team);
-
-    // 2) alias
-    if (!badge && TSDB_ALIASES[teamName]) {
-      team = await fetchTeamFromTSDB(TSDB_ALIASES[teamName]);
-      badge = pickBadge(team);
-    }
-
-    // 3) strip accents (Atlético → Atletico)
-    if (!badge) {
-      const simplified = teamName.normalize("NFD").replace(/[\u0300-\u036f]/g, "");
-      if (simplified !== teamName) {
-        team = await fetchTeamFromTSDB(simplified);
-        badge = pickBadge(team);
-      }
-    }
-
-    if (badge) {
-      cache[teamName] = badge;
-      saveTsdbCache(cache);
-    }
-
-    return badge;
-  }
-
-  async function applyClubLogosFromTSDB(data) {
-    const cache = loadTsdbCache();
-
-    // unieke clubs verzamelen
-    const clubs = new Set();
-    for (const t of data.tournaments || []) {
-      for (const p of t.players || []) {
-        for (const c of p.clubs || []) {
-          if (c?.club) clubs.add(c.club);
-        }
-      }
-    }
-
-    // badges ophalen (rustig aan ivm rate limit)
-    for (const clubName of clubs) {
-      try {
-        await resolveBadge(clubName, cache);
-      } catch (e) {
-        // ignore individuele failures
-      }
-      await sleep(200);
-    }
-
-    // inject in dataset
-    for (const t of data.tournaments || []) {
-      for (const p of t.players || []) {
-        for (const c of p.clubs || []) {
-          if (!c.clubLogo && c.club && cache[c.club]) {
-            c.clubLogo = cache[c.club];
-          }
-        }
-      }
-    }
-
-    console.log("[TSDB] cache size:", Object.keys(cache).length);
-  }
-
   // ========= DOM =========
   const els = {
     yearSlider: document.getElementById("yearSlider"),
@@ -175,6 +46,9 @@
 
   // ====== state ======
   let data = null;
+  let manifest = null; // /js/data/manifest.json (als de generator shards heeft geschreven)
+  let spriteSheet = null; // logo atlas (generate_data.py --logos sprite)
+  const tournamentsByYear = new Map();
   let years = [];
   let currentYear = null;
   let selectedPlayerId = null;
@@ -182,7 +56,8 @@
   // ====== helpers ======
   const safe = (v, fallback = "—") =>
     v === undefined || v === null || v === "" ? fallback : v;
-  const num = (v) => (Number.isFinite(Number(v)) ? Number(v) : null);
+  // Number(null) === 0: zonder deze check belanden clubs zonder coords op [0, 0]
+  const num = (v) => (v !== null && v !== "" && Number.isFinite(Number(v)) ? Number(v) : null);
 
   function clubsUpToYear(clubs, cutoffYear) {
     const list = Array.isArray(clubs) ? clubs.slice() : [];
@@ -221,8 +96,124 @@
     );
   }
 
+  // ====== voorberekende kaartlagen (generate_data.py → t.layers) ======
+  // spell-indexen wijzen in p.clubs; zonder layers (oude data.json) of voor een
+  // ander jaar dan het toernooi zelf rekenen we het gewoon in de browser uit.
+  const playerQid = (p) => String(p?.id ?? "").slice(String(p?.id ?? "").lastIndexOf("-") + 1);
+
+  function layersFor(t, year) {
+    return t?.layers && Number(year) === Number(t.year) ? t.layers : null;
+  }
+
+  function stintAt(t, p, year) {
+    const layers = layersFor(t, year);
+    if (!layers?.atYear) return clubAtYear(p.clubs, year);
+    const i = layers.atYear[playerQid(p)];
+    return i === undefined ? null : p.clubs[i] || null;
+  }
+
+  function routeUpTo(t, p, cutoff) {
+    const route = layersFor(t, cutoff)?.routes?.[playerQid(p)];
+    if (!route) return clubsUpToYear(p.clubs, cutoff);
+    return route
+      .filter(([i]) => p.clubs[i])
+      .map(([i, toView]) => ({ ...p.clubs[i], _toView: toView }));
+  }
+
+  // zelfde volgorde als name_sort_key in data_format.py (accenten/hoofdletters weg,
+  // dan de naam zelf), niet localeCompare: die hangt van browser en locale af
+  const foldName = (s) => String(s ?? "").normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+  const cmp = (a, b) => (a < b ? -1 : a > b ? 1 : 0);
+  const nameOrder = (a, b) => cmp(foldName(a), foldName(b)) || cmp(String(a ?? ""), String(b ?? ""));
+
+  function yearLocations(t, year) {
+    const y = Number(year);
+    const layers = layersFor(t, y);
+
+    if (layers?.locations) {
+      const byQid = new Map(t.players.map((p) => [playerQid(p), p]));
+      return layers.locations.map(({ latlng, players }) => ({
+        latlng,
+        items: players
+          .filter((qid) => byQid.has(qid))
+          .map((qid) => ({ player: byQid.get(qid), stint: stintAt(t, byQid.get(qid), y) })),
+      }));
+    }
+
+    const grouped = new Map();
+    for (const p of t.players) {
+      const stint = clubAtYear(p.clubs, y);
+      if (!stint) continue;
+
+      const ll = getLatLngFromClub(stint);
+      if (!ll) continue;
+
+      const key = `${ll[0].toFixed(6)},${ll[1].toFixed(6)}`;
+      if (!grouped.has(key)) grouped.set(key, { latlng: ll, items: [] });
+      grouped.get(key).items.push({ player: p, stint });
+    }
+    for (const g of grouped.values()) {
+      g.items.sort((a, b) => nameOrder(a.player.name, b.player.name));
+    }
+    return [...grouped.values()];
+  }
+
+  // data.json kan het compacte formaat zijn (clubs/players/tournaments tabellen,
+  // zie generate_data.py / data_format.py) → terug naar tournaments → players → clubs
+  function expandDataset(raw) {
+    if (!raw || raw.format !== "normalized") return raw;
+
+    const clubs = raw.clubs || {};
+    const players = raw.players || {};
+
+    const expandSpell = ([clubId, from, to]) => {
+      const c = clubs[clubId] || {};
+      const lat = num(c.lat);
+      const lng = num(c.lng);
+      return {
+        club: c.club,
+        from,
+        to,
+        country: c.country,
+        stadium: c.stadium,
+        lat,
+        lng,
+        latlng: lat !== null && lng !== null ? [lat, lng] : null,
+        clubLogo: c.clubLogo,
+        logoSprite: c.logoSprite || null,
+        clubId: String(clubId).startsWith("name:") ? null : clubId,
+      };
+    };
+
+    // zelfde speler in meerdere toernooien → clubs maar één keer uitpakken
+    const clubsByQid = new Map();
+    const clubsOf = (qid) => {
+      if (!clubsByQid.has(qid)) clubsByQid.set(qid, (players[qid]?.clubs || []).map(expandSpell));
+      return clubsByQid.get(qid);
+    };
+
+    return {
+      sprites: raw.sprites || null,
+      tournaments: (raw.tournaments || []).map((t) => ({
+        ...t,
+        players: (t.players || [])
+          .filter((qid) => players[qid])
+          .map((qid) => ({
+            id: `${t.key}-${qid}`,
+            name: players[qid].name,
+            position: players[qid].position,
+            birthCountry: players[qid].birthCountry,
+            birthPlace: players[qid].birthPlace,
+            clubs: clubsOf(qid),
+          })),
+      })),
+    };
+  }
+
   // ====== MAP ======
   let map, streetLayer, satelliteLayer, markersLayer, routeLayer;
+  // huidige jaar-weergave: {markers per locatie, clusters per zoomband}
+  let yearView = null;
 
   function initMap() {
     if (map) {
@@ -249,9 +240,14 @@
 
     markersLayer = L.layerGroup().addTo(map);
     routeLayer = L.polyline([], { weight: 4, opacity: 0.9 }).addTo(map);
+
+    map.on("zoomend", () => {
+      if (yearView) drawYearMarkers();
+    });
   }
 
   function clearMap() {
+    yearView = null;
     markersLayer.clearLayers();
     routeLayer.setLatLngs([]);
     els.mapSub.textContent = "Clubs van geselecteerde speler";
@@ -265,10 +261,28 @@
     return null;
   }
 
-  function clubLogoMarker(latlng, logoUrl, fallbackText = "•") {
+  // sheet.image is relatief aan het bestand waar de sheet in stond (manifest.json of data.json)
+  function useSpriteSheet(sheet, fromUrl) {
+    spriteSheet = { ...sheet, url: new URL(sheet.image, fromUrl).toString() };
+  }
+
+  // logo uit de sprite atlas: [x, y, w, h] in een vakje van spriteSheet.size px
+  function spriteHtml(rect, px, extraStyle = "") {
+    if (!spriteSheet || !Array.isArray(rect)) return null;
+    const [x, y, w, h] = rect;
+    const scale = px / spriteSheet.size;
+    const url = spriteSheet.url;
+    return `
+      <div style="width:${px}px;height:${px}px;display:inline-flex;align-items:center;justify-content:center;${extraStyle}">
+        <div style="width:${w * scale}px;height:${h * scale}px;background:url('${url}') -${x * scale}px -${y * scale}px / ${spriteSheet.width * scale}px ${spriteSheet.height * scale}px no-repeat;"></div>
+      </div>
+    `;
+  }
+
+  function clubLogoMarker(latlng, logoUrl, fallbackText = "•", logoSprite = null) {
     const src = logoUrl || FALLBACK_BADGE;
 
-    const html = `
+    const html = spriteHtml(logoSprite, 34, "filter:drop-shadow(0 2px 6px rgba(0,0,0,.35));") || `
       <img
         src="${src}"
         alt=""
@@ -288,39 +302,77 @@
     });
   }
 
-  function renderYearOnMap(year, players) {
-    clearMap();
+  function clusterMarker(latlng, count) {
+    const px = count >= 100 ? 46 : count >= 10 ? 38 : 32;
+    return L.marker(latlng, {
+      icon: L.divIcon({
+        className: "club-cluster-marker",
+        html: `<div>${count}</div>`,
+        iconSize: [px, px],
+        iconAnchor: [px / 2, px / 2],
+      }),
+    });
+  }
 
-    const y = Number(year);
-    const grouped = new Map();
+  // clusters van de band die bij de huidige zoom hoort; daarboven (of zonder
+  // clusters in de data) gewoon één marker per locatie
+  function drawYearMarkers() {
+    markersLayer.clearLayers();
 
-    for (const p of players) {
-      const stint = clubAtYear(p.clubs, y);
-      if (!stint) continue;
+    const { markers, clusters } = yearView;
+    const zoom = map.getZoom();
+    const band = (clusters || []).find((b) => b.minZoom <= zoom && zoom <= b.maxZoom);
 
-      const ll = getLatLngFromClub(stint);
-      if (!ll) continue;
+    if (!band) {
+      markers.forEach((m) => m?.marker.addTo(markersLayer));
+      return;
+    }
 
-      const key = `${ll[0].toFixed(6)},${ll[1].toFixed(6)}`;
-      if (!grouped.has(key)) grouped.set(key, { latlng: ll, items: [] });
+    for (const [lat, lng, count, members] of band.clusters) {
+      const present = members.map((i) => markers[i]).filter(Boolean);
+      if (!present.length) continue;
 
-      grouped.get(key).items.push({
-        playerName: p.name,
-        club: stint.club,
-        stadium: stint.stadium || null,
-        clubLogo: stint.clubLogo || null,
-      });
+      if (present.length === 1) {
+        present[0].marker.addTo(markersLayer);
+        continue;
+      }
+
+      clusterMarker([lat, lng], count)
+        .on("click", () =>
+          map.fitBounds(L.latLngBounds(present.map((m) => m.latlng)), {
+            padding: [40, 40],
+            maxZoom: band.maxZoom + 1,
+          })
+        )
+        .addTo(markersLayer);
     }
+  }
+
+  function renderYearOnMap(t) {
+    clearMap();
 
+    const y = Number(t.year);
     routeLayer.setLatLngs([]);
 
     const points = [];
-
-    for (const { latlng, items } of grouped.values()) {
+    const markers = [];
+
+    for (const loc of yearLocations(t, y)) {
+      const latlng = loc.latlng;
+      markers.push(null);
+      const items = loc.items
+        .filter((x) => x.stint)
+        .map(({ player, stint }) => ({
+          playerName: player.name,
+          club: stint.club,
+          stadium: stint.stadium || null,
+          clubLogo: stint.clubLogo || null,
+          logoSprite: stint.logoSprite || null,
+        }));
+      if (!items.length) continue;
       points.push(latlng);
 
       const lines = items
-        .sort((a, b) => a.playerName.localeCompare(b.playerName))
         .map((x) => {
           const s = x.stadium ? ` • ${x.stadium}` : "";
           return `<div>• <b>${x.playerName}</b><br><span style="opacity:.85">${x.club}${s}</span></div>`;
@@ -334,11 +386,15 @@
         </div>
       `;
 
-      const logo = items.find((i) => i.clubLogo)?.clubLogo || null;
+      const withLogo = items.find((i) => i.logoSprite || i.clubLogo);
 
-      clubLogoMarker(latlng, logo, "•").bindPopup(popup).addTo(markersLayer);
+      const marker = clubLogoMarker(latlng, withLogo?.clubLogo || null, "•", withLogo?.logoSprite).bindPopup(popup);
+      markers[markers.length - 1] = { latlng, marker };
     }
 
+    yearView = { markers, clusters: layersFor(t, y)?.clusters || null };
+    drawYearMarkers();
+
     if (!points.length) {
       els.mapSub.textContent = `Geen club-locaties gevonden voor ${y}. (Check latlng in data.json)`;
       map.setView([52.3729, 4.8936], 5);
@@ -349,12 +405,11 @@
     els.mapSub.textContent = `${y} • alle spelers • ${points.length} unieke locaties`;
   }
 
-  function renderPlayerOnMap(player) {
+  function renderPlayerOnMap(player, clubs) {
     clearMap();
     if (!player) return;
 
     const cutoff = Number(currentYear);
-    const clubs = clubsUpToYear(player.clubs, cutoff);
 
     const grouped = new Map();
     for (const c of clubs) {
@@ -388,9 +443,9 @@
         </div>
       `;
 
-      const firstLogo = items.find((c) => c.clubLogo)?.clubLogo || null;
+      const withLogo = items.find((c) => c.logoSprite || c.clubLogo);
 
-      clubLogoMarker(latlng, firstLogo, player.name?.[0] || "•")
+      clubLogoMarker(latlng, withLogo?.clubLogo || null, player.name?.[0] || "•", withLogo?.logoSprite)
         .bindPopup(popup)
         .addTo(markersLayer);
     }
@@ -419,7 +474,7 @@
 
   // ====== UI RENDER ======
   function renderTournament(year) {
-    const t = data.tournaments.find((x) => Number(x.year) === Number(year));
+    const t = tournamentsByYear.get(Number(year));
     if (!t) return;
 
     currentYear = year;
@@ -465,11 +520,11 @@
       </div>
     `;
 
-    renderYearOnMap(t.year, t.players);
+    renderYearOnMap(t);
   }
 
   function renderPlayer(year, playerId) {
-    const t = data.tournaments.find((x) => Number(x.year) === Number(year));
+    const t = tournamentsByYear.get(Number(year));
     if (!t) return;
 
     const p = t.players.find((x) => x.id === playerId);
@@ -478,9 +533,9 @@
     els.playerSub.textContent = `${p.name} • ${safe(p.position)}`;
 
     const cutoff = Number(currentYear);
-    const clubs = clubsUpToYear(p.clubs, cutoff);
+    const clubs = routeUpTo(t, p, cutoff);
 
-    const stintNow = clubAtYear(p.clubs, cutoff);
+    const stintNow = stintAt(t, p, cutoff);
     const clubInYear = stintNow
       ? `${stintNow.club}${stintNow.country ? ` (${stintNow.country})` : ""}`
       : "—";
@@ -490,9 +545,9 @@
         const hasCoords = !!getLatLngFromClub(c);
         const extra = hasCoords ? "" : " • (geen coords)";
         const period = `${c.from}–${c._toView ?? cutoff}`;
-        const logo = (c.clubLogo || FALLBACK_BADGE)
-          ? `<img src="${c.clubLogo || FALLBACK_BADGE}" alt="" style="width:20px;height:20px;object-fit:contain;margin-right:8px;vertical-align:middle" onerror="this.onerror=null;this.src='${FALLBACK_BADGE}';" />`
-          : "";
+        const logo =
+          spriteHtml(c.logoSprite, 20, "margin-right:8px;vertical-align:middle;") ||
+          `<img src="${c.clubLogo || FALLBACK_BADGE}" alt="" style="width:20px;height:20px;object-fit:contain;margin-right:8px;vertical-align:middle" onerror="this.onerror=null;this.src='${FALLBACK_BADGE}';" />`;
 
         return `
           <li class="club">
@@ -523,7 +578,7 @@
       </ul>
     `;
 
-    renderPlayerOnMap(p);
+    renderPlayerOnMap(p, clubs);
   }
 
   // ====== slider ======
@@ -536,33 +591,97 @@
     els.yearSlider.value = String(years.length - 1);
     els.snapHint.textContent = "";
 
+    let wanted = null;
     const onInput = () => {
       const idx = parseInt(els.yearSlider.value, 10);
       const year = years[Math.max(0, Math.min(years.length - 1, idx))];
-      renderTournament(year);
+      wanted = year;
+
+      loadTournament(year)
+        .then(() => {
+          // tijdens het laden verder geschoven? dan niet meer tekenen
+          if (wanted === year) renderTournament(year);
+        })
+        .catch((err) => {
+          console.error(err);
+          els.metaLine.textContent = `Fout: toernooi ${year} niet geladen.`;
+        });
     };
 
     els.yearSlider.addEventListener("input", onInput);
     onInput();
   }
 
+  // ====== data ======
+  function addTournaments(list) {
+    for (const t of list || []) {
+      const y = Number(t.year);
+      if (Number.isFinite(y)) tournamentsByYear.set(y, t);
+    }
+  }
+
+  // shards hebben een content-hash in de naam → gewoon browser cache gebruiken
+  async function loadTournament(year) {
+    const y = Number(year);
+    if (tournamentsByYear.has(y) || !manifest) return;
+
+    const entry = manifest.tournaments.find((t) => Number(t.year) === y);
+    if (!entry) return;
+
+    const url = new URL(`/js/data/${entry.file}`, window.location.href).toString();
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`Kon shard niet laden (${res.status}) via ${url}`);
+
+    const shard = expandDataset(await res.json());
+    // oudere shards hadden de atlas er zelf in; nu staat hij in manifest.json
+    if (shard.sprites && !spriteSheet) useSpriteSheet(shard.sprites, url);
+    addTournaments(shard.tournaments);
+  }
+
+  async function loadManifest() {
+    try {
+      const url = new URL("/js/data/manifest.json", window.location.href).toString();
+      const res = await fetch(url, { cache: "no-cache" });
+      if (!res.ok) return null;
+      const json = await res.json();
+      if (!Array.isArray(json?.tournaments)) return null;
+      if (json.sprites) useSpriteSheet(json.sprites, url);
+      return json;
+    } catch {
+      return null;
+    }
+  }
+
   // ====== boot ======
   async function boot() {
     initMap();
 
-    // let op: data.json zit bij jou in /js/data.json
+    // eerst het kleine manifest; alleen het getoonde toernooi wordt geladen
+    manifest = await loadManifest();
+    if (manifest) {
+      years = manifest.tournaments
+        .map((t) => Number(t.year))
+        .filter((y) => Number.isFinite(y))
+        .sort((a, b) => a - b);
+
+      if (!years.length) {
+        els.metaLine.textContent = "Manifest geladen, maar geen tournaments gevonden.";
+        return;
+      }
+
+      initSlider();
+      return;
+    }
+
+    // fallback: alles in één keer uit /js/data.json
     const url = new URL("/js/data.json", window.location.href).toString();
-    const res = await fetch(url, { cache: "no-store" });
+    // no-cache = wel revalideren (ETag), niet elke keer alles opnieuw downloaden
+    const res = await fetch(url, { cache: "no-cache" });
     if (!res.ok) throw new Error(`Kon data.json niet laden (${res.status}) via ${url}`);
 
-    data = await res.json();
-
-    // ✅ logo’s ophalen NA het laden van data
-    // try {
-    //   await applyClubLogosFromTSDB(data);
-    // } catch (e) {
-    //   console.warn("TSDB logos ophalen faalde, ga door zonder logos.", e);
-    // }
+    data = expandDataset(await res.json());
+    if (data.sprites) useSpriteSheet(data.sprites, url);
+    addTournaments(data.tournaments);
 
     years = (data.tournaments || [])
       .map((t) => Number(t.year))
@@ -0,0 +1,254 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional, List, Dict, Any
+
+import generate_data as g
+from data_format import write_json, write_json_stream, write_shards
+from http_client import HttpClient, DEFAULT_RATES
+from response_cache import ResponseCache
+from standin_server import StandIn
+
+
+# -----------------------------
+# Benchmark van een volledige build tegen de lokale stand-in
+#
+#   python bench_build.py                                  synthetische data, geen latency
+#   python bench_build.py --replay .cache/responses.sqlite --latency-ms 80 --throttle 0.02
+#   python bench_build.py --compare .bench/<oud>.json
+#
+# Meet wall time, requests/bytes per endpoint, 429's en piekgeheugen
+# (tracemalloc) en schrijft alles naar .bench/<commit>.json, zodat runs op
+# verschillende commits naast elkaar te leggen zijn.
+# -----------------------------
+
+RESULT_VERSION = 1
+
+# endpoint op de stand-in → echte host (voor dezelfde rate limits als in productie)
+REAL_HOSTS = {
+    "wiki": "en.wikipedia.org",
+    "wd": "www.wikidata.org",
+    "sparql": "query.wikidata.org",
+    "tsdb": "www.thesportsdb.com",
+}
+
+
+def git_commit() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=here,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{rev}-dirty" if dirty else rev
+
+
+def point_at(standin: StandIn, args: argparse.Namespace, cache: Optional[ResponseCache]) -> None:
+    """generate_data module globals → stand-in, met een verse HttpClient."""
+    for name, url in standin.urls().items():
+        setattr(g, name, url)
+
+    hosts = standin.hosts()
+    if args.unthrottled:
+        rates = {host: (10_000.0, 10_000) for host in hosts.values()}
+    else:
+        rates = {hosts[name]: DEFAULT_RATES[real] for name, real in REAL_HOSTS.items()}
+    concurrency = {hosts["sparql"]: 3, hosts["tsdb"]: 2}
+
+    g.CLIENT = HttpClient(g.HEADERS, cache=cache, rates=rates, concurrency=concurrency,
+                          max_in_flight=args.max_in_flight, backoff=args.backoff)
+    g.SPARQL_CHUNK = args.sparql_chunk
+
+
+def run_once(args: argparse.Namespace, out_dir: str) -> Dict[str, Any]:
+    standin = StandIn(args.replay, args.strict, args.latency_ms, args.jitter_ms,
+                      args.throttle, args.retry_after, args.seed)
+    standin.start()
+
+    cache = None
+    if args.warm_cache:
+        cache = ResponseCache(os.path.join(out_dir, "responses.sqlite"))
+
+    try:
+        log = io.StringIO()
+        passes = 2 if args.warm_cache else 1
+        for i in range(passes):
+            point_at(standin, args, cache)
+            if i == passes - 1:
+                # alleen de laatste (warme) pass meten
+                standin.reset_stats()
+
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            with contextlib.ExitStack() as stack:
+                stack.enter_context(contextlib.redirect_stdout(sys.stdout if args.verbose else log))
+                if args.stream:
+                    # store open houden tot alles geschreven is (spelers worden lazy gelezen)
+                    store = stack.enter_context(g.NdjsonPlayerStore(
+                        os.path.join(out_dir, f"work{i}", "players.ndjson"), reset=True))
+                    results = g.build_teams_stream(args.teams, store, from_year=args.from_year,
+                                                   badges=args.badges, competitions=args.competitions)
+                else:
+                    results = g.build_teams_data(args.teams, from_year=args.from_year, normalized=True,
+                                                 badges=args.badges, competitions=args.competitions)
+                written = 0
+                for team, data in results.items():
+                    team_dir = os.path.join(out_dir, team)
+                    os.makedirs(team_dir, exist_ok=True)
+                    write = write_json_stream if args.stream else write_json
+                    paths = write(os.path.join(team_dir, "data.json"), data)
+                    manifest = write_shards(data, os.path.join(team_dir, "data"))
+                    written += sum(os.path.getsize(p) for p in paths)
+                    written += sum(e["bytes"] for e in manifest["tournaments"])
+            wall = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        standin.stop()
+        if cache is not None:
+            cache.close()
+
+    endpoints = standin.stats_json()
+    return {
+        "wall_s": round(wall, 3),
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+        "endpoints": endpoints,
+        "requests": sum(e["requests"] for e in endpoints.values()),
+        "bytes": sum(e["bytes"] for e in endpoints.values()),
+        "throttled": sum(e["throttled"] for e in endpoints.values()),
+        "output": {
+            "tournaments": sum(len(d["tournaments"]) for d in results.values()),
+            "players": sum(len(d["players"]) for d in results.values()),
+            "clubs": sum(len(d["clubs"]) for d in results.values()),
+            "bytes": written,
+        },
+    }
+
+
+def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    runs = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as out_dir:
+            runs.append(run_once(args, out_dir))
+
+    walls = [r["wall_s"] for r in runs]
+    first = runs[0]
+    return {
+        "version": RESULT_VERSION,
+        "commit": git_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            "teams": args.teams,
+            "competitions": args.competitions,
+            "from_year": args.from_year,
+            "replay": bool(args.replay),
+            "strict": args.strict,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "throttle": args.throttle,
+            "retry_after": args.retry_after,
+            "seed": args.seed,
+            "unthrottled": args.unthrottled,
+            "warm_cache": args.warm_cache,
+            "max_in_flight": args.max_in_flight,
+            "sparql_chunk": args.sparql_chunk,
+            "badges": args.badges,
+            "stream": args.stream,
+            "repeat": args.repeat,
+        },
+        "wall_s": {"min": min(walls), "median": round(statistics.median(walls), 3), "runs": walls},
+        "peak_mem_mb": max(r["peak_mem_mb"] for r in runs),
+        "requests": first["requests"],
+        "bytes": first["bytes"],
+        "throttled": first["throttled"],
+        "endpoints": first["endpoints"],
+        "output": first["output"],
+    }
+
+
+def print_result(r: Dict[str, Any]) -> None:
+    print(f"commit {r['commit']}  ({', '.join(r['config']['teams'])} vanaf {r['config']['from_year']})")
+    print(f"  wall    {r['wall_s']['median']:.2f} s (min {r['wall_s']['min']:.2f}, {len(r['wall_s']['runs'])} runs)")
+    print(f"  geheugen {r['peak_mem_mb']:.1f} MB piek (tracemalloc)")
+    print(f"  requests {r['requests']}  ({r['bytes'] / 1024:.0f} KB, {r['throttled']} x 429)")
+    for name, e in r["endpoints"].items():
+        if e["requests"]:
+            print(f"    {name:<7} {e['requests']:>6} req  {e['bytes'] / 1024:>8.0f} KB  {e['throttled']:>4} x 429")
+    o = r["output"]
+    print(f"  output  {o['tournaments']} toernooien, {o['players']} spelers, {o['clubs']} clubs, {o['bytes'] / 1024:.0f} KB")
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    def row(label: str, a: float, b: float, unit: str = "") -> None:
+        delta = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        print(f"  {label:<14} {a:>12.2f}{unit} → {b:>12.2f}{unit}  {delta}")
+
+    if old.get("config") != new.get("config"):
+        print("  ! let op: andere config, vergelijking is niet 1-op-1")
+    print(f"{old['commit']} → {new['commit']}")
+    row("wall (median)", old["wall_s"]["median"], new["wall_s"]["median"], " s")
+    row("peak mem", old["peak_mem_mb"], new["peak_mem_mb"], " MB")
+    row("requests", old["requests"], new["requests"])
+    row("KB", old["bytes"] / 1024, new["bytes"] / 1024)
+    for name in new["endpoints"]:
+        a = old["endpoints"].get(name, {}).get("requests", 0)
+        b = new["endpoints"][name]["requests"]
+        if a or b:
+            row(f"  {name}", a, b)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmark generate_data.py tegen een lokale stand-in")
+    ap.add_argument("--teams", nargs="+", default=[g.DEFAULT_TEAM])
+    ap.add_argument("--competitions", nargs="+", default=None)
+    ap.add_argument("--from-year", type=int, default=1990)
+    ap.add_argument("--replay", default=None, help="response cache (SQLite) om af te spelen")
+    ap.add_argument("--strict", action="store_true", help="alleen replay, niks verzinnen")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--throttle", type=float, default=0.0, help="kans op een 429 per request (0..1)")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--backoff", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--unthrottled", action="store_true", help="geen productie rate limits op de client")
+    ap.add_argument("--warm-cache", action="store_true",
+                    help="eerst een build om een lege cache te vullen, dan de tweede meten")
+    ap.add_argument("--max-in-flight", type=int, default=8)
+    ap.add_argument("--sparql-chunk", type=int, default=g.SPARQL_CHUNK)
+    ap.add_argument("--badges", choices=g.BADGE_MODES, default="missing")
+    ap.add_argument("--stream", action="store_true", help="build_teams_stream i.p.v. build_teams_data")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--out", default=None, help="resultaat JSON (default .bench/<commit>.json)")
+    ap.add_argument("--compare", default=None, help="eerder resultaat om mee te vergelijken")
+    ap.add_argument("--verbose", action="store_true", help="output van de build laten zien")
+    return ap.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = benchmark(args)
+    print_result(result)
+
+    out = args.out or os.path.join(".bench", f"{result['commit']}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"  → {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
@@ -0,0 +1,219 @@
+import bisect
+import contextlib
+import json
+import math
+import threading
+import time
+from typing import Optional, List, Dict, Any, Iterable, Iterator
+
+
+# -----------------------------
+# Instrumentatie voor generate_data.py → build_report.json
+#
+# - stages:    tijd + aantal keer per stage (squads, qids, footballers, ...)
+#              (stages die parallel lopen tellen allebei hun eigen wall time)
+# - endpoints: per soort request (wiki, sparql, ...) latency histogram,
+#              HTTP statussen, retries, fouten en cache hits/misses
+# - errors:    exceptions die de build opvangt en doorgaat (met de QIDs erbij)
+# - dropped:   spelers/titles die niet in de output komen, met de reden
+# - degraded:  spelers die wel in de output komen, maar met onvolledige data
+#              (bv. clubs zonder naam/coords omdat club_info faalde)
+# -----------------------------
+
+# bovengrenzen van de histogram buckets in ms (laatste bucket = alles erboven)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    def __init__(self, bounds: Iterable[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.values: List[float] = []
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.values.append(ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        # nearest-rank: kleinste waarde waar minstens p% van de metingen onder of op ligt
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return round(ordered[min(len(ordered), rank) - 1], 1)
+
+    def to_json(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": len(self.values),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(max(self.values), 1) if self.values else None,
+            "total_ms": round(sum(self.values), 1),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes = 0
+
+    def to_json(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "requests": self.latency.to_json(),
+            "statuses": self.statuses,
+            "retries": self.retries,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": round(self.cache_hits / lookups, 3) if lookups else None,
+            },
+        }
+
+
+class BuildReport:
+    """Thread-safe verzamelbak; HttpClient en generate_data.py schrijven erin."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.errors: List[Dict[str, Any]] = []
+        self.dropped: Dict[str, Dict[str, Any]] = {}
+        self.degraded: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.extra: Dict[str, Any] = {}
+
+    # --- stages ---
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                s = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                s["calls"] += 1
+                s["seconds"] += elapsed
+
+    # --- HTTP (aangeroepen door HttpClient) ---
+
+    def _endpoint(self, kind: str) -> EndpointStats:
+        if kind not in self.endpoints:
+            self.endpoints[kind] = EndpointStats()
+        return self.endpoints[kind]
+
+    def request(self, kind: str, seconds: float, status: Optional[int], size: int = 0) -> None:
+        """Eén HTTP poging; status None = verbinding mislukt."""
+        with self._lock:
+            e = self._endpoint(kind)
+            e.latency.add(seconds * 1000)
+            key = str(status) if status is not None else "connection_error"
+            e.statuses[key] = e.statuses.get(key, 0) + 1
+            e.bytes += size
+
+    def retry(self, kind: str) -> None:
+        with self._lock:
+            self._endpoint(kind).retries += 1
+
+    def http_error(self, kind: str) -> None:
+        with self._lock:
+            self._endpoint(kind).errors += 1
+
+    def cache_lookup(self, kind: str, hit: bool) -> None:
+        with self._lock:
+            e = self._endpoint(kind)
+            if hit:
+                e.cache_hits += 1
+            else:
+                e.cache_misses += 1
+
+    # --- opgevangen fouten en weggevallen spelers ---
+
+    def error(self, stage: str, exc: BaseException, items: Optional[List[str]] = None) -> None:
+        """Exception die de build opvangt (en daarna gewoon doorgaat)."""
+        with self._lock:
+            self.errors.append({
+                "stage": stage,
+                "type": type(exc).__name__,
+                "message": str(exc)[:500],
+                "items": list(items or []),
+            })
+
+    def drop(self, item: str, reason: str, **info: Any) -> None:
+        with self._lock:
+            self.dropped[item] = {"reason": reason, **info}
+
+    def degrade(self, item: str, reason: str, **info: Any) -> None:
+        with self._lock:
+            self.degraded[item] = {"reason": reason, **info}
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # --- output ---
+
+    def to_json(self) -> Dict[str, Any]:
+        def by_reason(items: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+            reasons: Dict[str, int] = {}
+            for d in items.values():
+                reasons[d["reason"]] = reasons.get(d["reason"], 0) + 1
+            return reasons
+
+        with self._lock:
+
+            return {
+                "version": 1,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "wall_s": round(time.time() - self.started, 3),
+                "stages": {
+                    name: {"calls": int(s["calls"]), "seconds": round(s["seconds"], 3)}
+                    for name, s in self.stages.items()
+                },
+                "endpoints": {kind: e.to_json() for kind, e in sorted(self.endpoints.items())},
+                "counters": dict(self.counters),
+                "errors": list(self.errors),
+                "dropped": {"by_reason": by_reason(self.dropped), "items": dict(self.dropped)},
+                "degraded": {"by_reason": by_reason(self.degraded), "items": dict(self.degraded)},
+                **self.extra,
+            }
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, indent=2)
+
+    def summary(self) -> List[str]:
+        """Korte tekst voor de console."""
+        data = self.to_json()
+        lines = []
+        for name, s in sorted(data["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            lines.append(f"  {name:<12} {s['seconds']:>8.2f} s  ({s['calls']}x)")
+        for kind, e in data["endpoints"].items():
+            r = e["requests"]
+            rate = e["cache"]["hit_rate"]
+            hit = f"{rate * 100:.0f}% cache" if rate is not None else "geen cache"
+            p95 = f"p95 {r['p95_ms']:.0f} ms" if r["p95_ms"] is not None else "-"
+            lines.append(f"  {kind:<12} {r['count']:>5} req  {p95:<12} {e['retries']} retries  "
+                         f"{e['errors']} fouten  {hit}")
+        if data["errors"]:
+            lines.append(f"  ! {len(data['errors'])} opgevangen fouten (zie errors in het rapport)")
+        if data["dropped"]["items"]:
+            why = ", ".join(f"{n}x {r}" for r, n in data["dropped"]["by_reason"].items())
+            lines.append(f"  weggevallen: {why}")
+        if data["degraded"]["items"]:
+            why = ", ".join(f"{n}x {r}" for r, n in data["degraded"]["by_reason"].items())
+            lines.append(f"  ! onvolledig: {why} (zie degraded in het rapport)")
+        return lines
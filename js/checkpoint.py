@@ -0,0 +1,37 @@
+import json
+import os
+from typing import Optional, Any
+
+
+# -----------------------------
+# Checkpoints per stage (squads, qids, players, clubs) voor generate_data.py
+#
+# Elke stage is één JSON bestand in de checkpoint map. Schrijven gaat via een
+# tmp bestand + os.replace, zodat een crash halverwege nooit een half bestand
+# achterlaat.
+# -----------------------------
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, stage: str) -> str:
+        return os.path.join(self.path, f"{stage}.json")
+
+    def load(self, stage: str) -> Optional[Any]:
+        try:
+            with open(self._file(stage), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            print(f"  ! checkpoint {stage} is kapot, wordt genegeerd")
+            return None
+
+    def save(self, stage: str, data: Any) -> None:
+        path = self._file(stage)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
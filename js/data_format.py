@@ -0,0 +1,484 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import unicodedata
+import zlib
+from collections.abc import Mapping
+from typing import Optional, List, Dict, Any, Iterable, Iterator
+
+try:
+    import brotli  # optioneel: pip install brotli
+except ImportError:
+    brotli = None
+
+from marker_clusters import cluster_bands
+
+
+# -----------------------------
+# Compact, genormaliseerd formaat
+#
+# {
+#   "format": "normalized", "version": 1,
+#   "clubs":   { clubId: {club, country, stadium, lat, lng, clubLogo} },
+#   "players": { qid: {name, position, birthCountry, birthPlace, clubs: [[clubId, from, to], ...]} },
+#   "tournaments": [ {key, year, name, host, result, coach, players: [qid, ...]} ],
+#   "sprites": {image, size, width, height}   (optioneel, --logos sprite; clubs hebben dan logoSprite;
+#              image is relatief aan dit bestand. Bij shards staat dit blok in manifest.json)
+#   (tournaments kunnen ook "layers" hebben, zie add_year_layers)
+# }
+#
+# Het oude geneste formaat (tournaments → players → clubs) blijft afleidbaar
+# via denormalize_data().
+# -----------------------------
+
+FORMAT_NAME = "normalized"
+FORMAT_VERSION = 1
+
+CLUB_FIELDS = ("club", "country", "stadium", "lat", "lng", "clubLogo")
+PLAYER_FIELDS = ("name", "position", "birthCountry", "birthPlace")
+TOURNAMENT_FIELDS = ("key", "year", "name", "host", "result", "coach")
+
+
+def is_normalized(data: Dict[str, Any]) -> bool:
+    return data.get("format") == FORMAT_NAME
+
+
+def club_key(c: Dict[str, Any]) -> str:
+    # oude data.json heeft geen clubId: val terug op de naam
+    return c.get("clubId") or f"name:{c.get('club')}"
+
+
+def player_qid(p: Dict[str, Any]) -> str:
+    # id = "<key>-<qid>"
+    return str(p.get("id", "")).rsplit("-", 1)[-1]
+
+
+def normalize_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Genest data.json → compacte tabellen (clubs, players, tournaments)."""
+    clubs: Dict[str, Dict[str, Any]] = {}
+    players: Dict[str, Dict[str, Any]] = {}
+    tournaments: List[Dict[str, Any]] = []
+
+    for t in data.get("tournaments", []):
+        refs: List[str] = []
+
+        for p in t.get("players", []):
+            qid = player_qid(p)
+            refs.append(qid)
+            if qid in players:
+                continue
+
+            spells = []
+            for c in p.get("clubs", []):
+                cid = club_key(c)
+                if cid not in clubs:
+                    clubs[cid] = {f: c.get(f) for f in CLUB_FIELDS}
+                spells.append([cid, c.get("from"), c.get("to")])
+
+            rec = {f: p.get(f) for f in PLAYER_FIELDS}
+            rec["clubs"] = spells
+            players[qid] = rec
+
+        out = {f: t.get(f) for f in TOURNAMENT_FIELDS}
+        if not out["key"]:
+            first = t.get("players", [{}])[0].get("id", "") if t.get("players") else ""
+            out["key"] = first.rsplit("-", 1)[0] if first else str(t.get("year"))
+        out["players"] = refs
+        tournaments.append(out)
+
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "clubs": clubs,
+        "players": players,
+        "tournaments": tournaments,
+    }
+
+
+def expand_spell(spell: List[Any], clubs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    cid, start, end = spell
+    info = clubs.get(cid, {})
+    lat, lng = info.get("lat"), info.get("lng")
+    return {
+        "club": info.get("club"),
+        "from": start,
+        "to": end,
+        "country": info.get("country"),
+        "stadium": info.get("stadium"),
+        "lat": lat,
+        "lng": lng,
+        "latlng": [lat, lng] if (lat is not None and lng is not None) else None,
+        "clubLogo": info.get("clubLogo"),
+        "clubId": None if cid.startswith("name:") else cid,
+        **({"logoSprite": info["logoSprite"]} if info.get("logoSprite") else {}),
+    }
+
+
+def denormalize_tournament(t: Dict[str, Any], clubs: Mapping, players: Mapping) -> Dict[str, Any]:
+    key = t.get("key")
+    player_objs: List[Dict[str, Any]] = []
+
+    for qid in t.get("players", []):
+        rec = players.get(qid)
+        if rec is None:
+            continue
+        player_objs.append({
+            "id": f"{key}-{qid}",
+            "name": rec.get("name"),
+            "position": rec.get("position"),
+            "birthCountry": rec.get("birthCountry"),
+            "birthPlace": rec.get("birthPlace"),
+            "clubs": [expand_spell(sp, clubs) for sp in rec.get("clubs", [])],
+        })
+
+    out = {f: t.get(f) for f in TOURNAMENT_FIELDS}
+    out["players"] = player_objs
+    if t.get("layers"):
+        out["layers"] = t["layers"]
+    return out
+
+
+class Stream:
+    """Herhaalbaar iterable met bekende lengte (bv. een NDJSON bestand); write_json_stream schrijft het als array."""
+
+    def __init__(self, make_iter, length: int):
+        self.make_iter = make_iter
+        self.length = length
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.make_iter())
+
+    def __len__(self) -> int:
+        return self.length
+
+
+def denormalize_data(data: Dict[str, Any], stream: bool = False) -> Dict[str, Any]:
+    """
+    Compacte tabellen → het geneste data.json formaat (backwards compatible).
+    stream=True: tournaments wordt een Stream (één toernooi tegelijk uitgepakt).
+    """
+    clubs = data.get("clubs", {})
+    players = data.get("players", {})
+
+    def tournaments() -> Iterator[Dict[str, Any]]:
+        for t in data.get("tournaments", []):
+            yield denormalize_tournament(t, clubs, players)
+
+    if stream:
+        out: Dict[str, Any] = {"tournaments": Stream(tournaments, len(data.get("tournaments", [])))}
+    else:
+        out = {"tournaments": list(tournaments())}
+    if data.get("sprites"):
+        out["sprites"] = data["sprites"]
+    return out
+
+
+# -----------------------------
+# Voorberekende kaartlagen per toernooi-jaar
+#
+# tournament["layers"] = {
+#   "atYear":    { qid: spellIndex }             club van de speler in dat jaar
+#   "routes":    { qid: [[spellIndex, toView]] } clubs t/m dat jaar, chronologisch
+#   "locations": [ {latlng, clubs: [clubId], players: [qid]} ]   spelers per locatie
+#   "clusters":  [ {minZoom, maxZoom, clusters: [[lat, lng, count, [locationIndex]]]} ]
+# }
+# spellIndex wijst in players[qid].clubs. Zelfde regels als clubAtYear /
+# clubsUpToYear in app.js, zodat de slider alleen nog hoeft op te zoeken.
+# -----------------------------
+
+def club_at_year(spells: List[List[Any]], year: int) -> Optional[int]:
+    order = sorted(
+        (i for i, sp in enumerate(spells) if isinstance(sp[1], int)),
+        key=lambda i: spells[i][1],
+    )
+    for i in order:
+        start, end = spells[i][1], spells[i][2]
+        if start <= year <= (9999 if end is None else end):
+            return i
+    return None
+
+
+def route_up_to(spells: List[List[Any]], cutoff: int) -> List[List[int]]:
+    order = sorted(
+        (i for i, sp in enumerate(spells) if isinstance(sp[1], int) and sp[1] <= cutoff),
+        key=lambda i: spells[i][1],
+    )
+    route = []
+    for i in order:
+        end = spells[i][2]
+        route.append([i, cutoff if end is None or end > cutoff else end])
+    return route
+
+
+def club_latlng(info: Dict[str, Any]) -> Optional[List[float]]:
+    lat, lng = info.get("lat"), info.get("lng")
+    if lat is None or lng is None:
+        return None
+    return [lat, lng]
+
+
+COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+
+
+def name_sort_key(name: Optional[str]) -> tuple:
+    """
+    Zonder accenten en hoofdletters, dan de naam zelf ("Özbiliz" vóór "Zenden").
+    app.js (nameOrder) sorteert de fallback precies zo, niet met localeCompare,
+    zodat de volgorde niet van de browser/locale afhangt.
+    """
+    name = name or ""
+    return COMBINING_MARKS.sub("", unicodedata.normalize("NFD", name)).lower(), name
+
+
+def year_layers(data: Dict[str, Any], t: Dict[str, Any]) -> Dict[str, Any]:
+    year = int(t["year"])
+    clubs = data.get("clubs", {})
+    players = data.get("players", {})
+
+    at_year: Dict[str, int] = {}
+    routes: Dict[str, List[List[int]]] = {}
+    locations: Dict[str, Dict[str, Any]] = {}
+
+    for qid in t.get("players", []):
+        spells = players.get(qid, {}).get("clubs", [])
+        routes[qid] = route_up_to(spells, year)
+
+        idx = club_at_year(spells, year)
+        if idx is None:
+            continue
+        at_year[qid] = idx
+
+        cid = spells[idx][0]
+        ll = club_latlng(clubs.get(cid, {}))
+        if ll is None:
+            continue
+
+        key = f"{ll[0]:.6f},{ll[1]:.6f}"
+        loc = locations.setdefault(key, {"latlng": ll, "clubs": [], "players": []})
+        if cid not in loc["clubs"]:
+            loc["clubs"].append(cid)
+        loc["players"].append(qid)
+
+    for loc in locations.values():
+        loc["players"].sort(key=lambda q: name_sort_key(players.get(q, {}).get("name")))
+
+    locs = list(locations.values())
+    # count = aantal spelers, leden = indexen in locations (zie marker_clusters.py)
+    clusters = cluster_bands([(i, l["latlng"][0], l["latlng"][1], len(l["players"])) for i, l in enumerate(locs)])
+
+    return {"atYear": at_year, "routes": routes, "locations": locs, "clusters": clusters}
+
+
+def add_year_layers(data: Dict[str, Any]) -> Dict[str, Any]:
+    for t in data.get("tournaments", []):
+        t["layers"] = year_layers(data, t)
+    return data
+
+
+# -----------------------------
+# Schrijven (minified + optioneel .gz / .br ernaast)
+# -----------------------------
+
+def dumps(data: Any, pretty: bool = False) -> str:
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_compressed(path: str, raw: bytes, compress: Iterable[str] = ()) -> List[str]:
+    """Schrijft path.gz / path.br naast path; geeft de geschreven paden terug."""
+    written: List[str] = []
+    for fmt in compress:
+        if fmt == "gz":
+            with open(path + ".gz", "wb") as f:
+                # mtime=0 => zelfde input geeft byte-voor-byte dezelfde .gz
+                f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+            written.append(path + ".gz")
+        elif fmt == "br":
+            if brotli is None:
+                print("  ! brotli niet geïnstalleerd (pip install brotli), .br overgeslagen")
+                continue
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(raw, quality=11))
+            written.append(path + ".br")
+        else:
+            raise ValueError(f"onbekende compressie: {fmt}")
+    return written
+
+
+def write_json(path: str, data: Any, pretty: bool = False, compress: Iterable[str] = ()) -> List[str]:
+    raw = dumps(data, pretty=pretty).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(raw)
+    return [path] + write_compressed(path, raw, compress)
+
+
+# -----------------------------
+# Streaming schrijven
+#
+# Top-level dict met als waarden gewone JSON, een Mapping (bv. spelers die
+# pas bij het lezen van schijf komen) of een Stream: die worden entry voor
+# entry geschreven, zonder ooit de hele string in het geheugen. Zelfde bytes
+# als dumps(data) (minified).
+# -----------------------------
+
+def iter_json_chunks(data: Dict[str, Any]) -> Iterator[str]:
+    yield "{"
+    for i, (key, value) in enumerate(data.items()):
+        yield ("," if i else "") + dumps(key) + ":"
+        if isinstance(value, Stream):
+            yield "["
+            for j, item in enumerate(value):
+                yield ("," if j else "") + dumps(item)
+            yield "]"
+        elif isinstance(value, Mapping) and not isinstance(value, dict):
+            yield "{"
+            for j, (k, v) in enumerate(value.items()):
+                yield ("," if j else "") + dumps(k) + ":" + dumps(v)
+            yield "}"
+        else:
+            yield dumps(value)
+    yield "}"
+
+
+def write_json_stream(path: str, data: Dict[str, Any], compress: Iterable[str] = ()) -> List[str]:
+    """Als write_json, maar gestreamd naar path (en .gz / .br) in plaats van één grote string."""
+    sinks = [open(path, "wb")]
+    written = [path]
+    for fmt in compress:
+        if fmt == "gz":
+            sinks.append(GzipSink(path + ".gz"))
+            written.append(path + ".gz")
+        elif fmt == "br":
+            if brotli is None:
+                print("  ! brotli niet geïnstalleerd (pip install brotli), .br overgeslagen")
+                continue
+            sinks.append(BrotliSink(path + ".br"))
+            written.append(path + ".br")
+        else:
+            raise ValueError(f"onbekende compressie: {fmt}")
+
+    try:
+        for chunk in iter_json_chunks(data):
+            raw = chunk.encode("utf-8")
+            for sink in sinks:
+                sink.write(raw)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return written
+
+
+class GzipSink:
+    def __init__(self, path: str):
+        self.f = open(path, "wb")
+        # wbits=31 = gzip header zonder mtime/bestandsnaam, net als gzip.compress(mtime=0):
+        # byte-voor-byte dezelfde .gz als write_compressed
+        self.c = zlib.compressobj(9, zlib.DEFLATED, 31)
+
+    def write(self, raw: bytes) -> None:
+        self.f.write(self.c.compress(raw))
+
+    def close(self) -> None:
+        self.f.write(self.c.flush())
+        self.f.close()
+
+
+class BrotliSink:
+    def __init__(self, path: str):
+        self.f = open(path, "wb")
+        self.c = brotli.Compressor(quality=11)
+
+    def write(self, raw: bytes) -> None:
+        self.f.write(self.c.process(raw))
+
+    def close(self) -> None:
+        self.f.write(self.c.finish())
+        self.f.close()
+
+
+# -----------------------------
+# Shards per toernooi + manifest
+#
+# manifest.json (klein, altijd revalideren) + per toernooi één shard met een
+# content-hash in de naam => shards kunnen "immutable" gecached worden, en een
+# shard die niet verandert houdt bij een rebuild dezelfde naam.
+# -----------------------------
+
+SHARD_NAME = re.compile(r"^[A-Za-z0-9_]+\.[0-9a-f]{10}\.json(\.gz|\.br)?$")
+
+
+def shard_for(data: Dict[str, Any], t: Dict[str, Any]) -> Dict[str, Any]:
+    """Zelfstandig stukje normalized data voor één toernooi."""
+    players = {q: data["players"][q] for q in t["players"] if q in data["players"]}
+    club_ids = sorted({sp[0] for rec in players.values() for sp in rec.get("clubs", [])})
+    shard = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "clubs": {c: data["clubs"][c] for c in club_ids if c in data["clubs"]},
+        "players": players,
+        "tournaments": [t],
+    }
+    # geen data["sprites"] hier: de atlas (en zijn hash) staat in manifest.json,
+    # anders krijgt elke shard een nieuwe naam zodra één logo verandert
+    return shard
+
+
+def write_shards(
+    data: Dict[str, Any],
+    out_dir: str,
+    compress: Iterable[str] = (),
+    sprites: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Schrijft <out_dir>/<key>.<hash>.json per toernooi en <out_dir>/manifest.json.
+    Oude shards die niet meer in het manifest staan worden opgeruimd.
+    sprites: logo atlas info (image relatief aan out_dir), komt in het manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    entries: List[Dict[str, Any]] = []
+    keep = set()
+
+    for t in data.get("tournaments", []):
+        shard = shard_for(data, t)
+        raw = dumps(shard).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()[:10]
+        name = f"{t['key']}.{digest}.json"
+        path = os.path.join(out_dir, name)
+
+        # zelfde hash = zelfde inhoud, niet opnieuw schrijven
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(raw)
+        missing = [c for c in compress if not os.path.exists(f"{path}.{c}")]
+        written = write_compressed(path, raw, missing)
+
+        keep.add(name)
+        keep.update(os.path.basename(w) for w in written)
+        keep.update(f"{name}.{c}" for c in compress)
+
+        entries.append({
+            "key": t["key"],
+            "year": t["year"],
+            "name": t["name"],
+            "players": len(shard["players"]),
+            "clubs": len(shard["clubs"]),
+            "file": name,
+            "bytes": len(raw),
+        })
+
+    for name in os.listdir(out_dir):
+        if SHARD_NAME.match(name) and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+    manifest = {
+        "format": "manifest",
+        "version": FORMAT_VERSION,
+        "tournaments": sorted(entries, key=lambda e: (int(e["year"]), e["key"])),
+    }
+    if sprites:
+        manifest["sprites"] = sprites
+    write_json(os.path.join(out_dir, "manifest.json"), manifest)
+    return manifest
@@ -1,8 +1,28 @@
+import argparse
+import cProfile
+import contextlib
+import io
 import json
+import pstats
+import os
+import re
+import tempfile
 import time
+import unicodedata
 import urllib.parse
 import requests
-from typing import Optional, List, Dict, Any, Tuple
+from collections.abc import Mapping
+from typing import Optional, List, Dict, Any, Tuple, Iterator
+
+from build_report import BuildReport
+from checkpoint import Checkpoint
+from data_format import (
+    CLUB_FIELDS, FORMAT_NAME, FORMAT_VERSION, Stream, club_key, normalize_data, denormalize_data,
+    add_year_layers, year_layers, write_json, write_json_stream, write_shards,
+)
+from http_client import HttpClient
+from ndjson_store import NdjsonLog, NdjsonSeq
+from response_cache import DEFAULT_TTLS, ResponseCache, OfflineCacheMiss
 
 WIKI_API = "https://en.wikipedia.org/w/api.php"
 WD_SPARQL = "https://query.wikidata.org/sparql"
@@ -13,180 +33,442 @@ HEADERS = {
     "Accept": "application/json",
 }
 
+# -----------------------------
+# 0) HTTP (+ persistente cache)
+# -----------------------------
+
+# Instrumentatie (timers, latency, retries, opgevangen fouten) → build_report.json
+REPORT = BuildReport()
+
+# Gedeelde client (session, rate limits, retries); __main__ zet er de cache in
+CLIENT = HttpClient(HEADERS, report=REPORT)
+
+
+def get_json(
+    kind: str,
+    url: str,
+    params: Dict[str, Any],
+    timeout: float,
+    refresh: bool = False,
+    store: bool = True,
+) -> Dict[str, Any]:
+    return CLIENT.get_json(kind, url, params, timeout=timeout, refresh=refresh, store=store)
+
+
 # -----------------------------
 # 1) Wikipedia template → lijst met linked titles
 # -----------------------------
 
-NOISE_TITLES = set([
-    "Netherlands national football team",
-    "FIFA World Cup",
-    "UEFA European Championship",
-    "Netherlands",
-    "Association football",
-    "Football",
-])
+# Toernooien, teams, template namen en ruis-titels staan in tournaments.json:
+#   competitions: {kind: {name, template, years}}   ({country} / {year} worden ingevuld)
+#   teams:        {code: {country, competitions, [templates: {kind: patroon}], [years: {kind: [...]}],
+#                         [formerNames: [{until: jaar, country}]]}}
+#                 formerNames: oude landnaam t/m dat jaar (West Germany, Soviet Union, ...), oplopend op until
+#   noise / teamNoise: links die geen speler zijn
+CATALOGUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tournaments.json")
+DEFAULT_TEAM = "NED"
 
-def wiki_template_links(template_title: str) -> List[str]:
+
+def load_catalogue(path: str = CATALOGUE_PATH) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def team_country(spec: Dict[str, Any], year: int) -> str:
+    """Landnaam van een team in een bepaald jaar (formerNames gaat voor country)."""
+    for former in spec.get("formerNames", []):
+        if year <= former["until"]:
+            return former["country"]
+    return spec["country"]
+
+
+def team_noise(catalogue: Dict[str, Any], team: str) -> set:
+    spec = catalogue["teams"][team]
+    countries = {spec["country"]} | {f["country"] for f in spec.get("formerNames", [])}
+    return set(catalogue.get("noise", [])) | {
+        p.format(country=c) for p in catalogue.get("teamNoise", []) for c in countries
+    }
+
+
+NOISE_TITLES = team_noise(load_catalogue(), DEFAULT_TEAM)
+
+# MediaWiki action=query accepteert max 50 titles per request (zonder bot-rechten)
+WIKI_MAX_TITLES = 50
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def wiki_query(
+    params: Dict[str, Any],
+    kind: str = "wiki",
+    refresh: bool = False,
+    store: bool = True,
+) -> List[Dict[str, Any]]:
     """
-    Haalt alle links uit een Wikipedia template (parse endpoint).
-    Let op: Wikipedia kan 403 geven zonder User-Agent.
+    action=query met continuation: geeft alle "query" blokken terug.
+    (bij prop=links met veel pagina's komt de rest via "continue")
     """
-    params = {
-        "action": "parse",
-        "page": template_title,
-        "prop": "links",
-        "format": "json",
-        "redirects": 1,
-    }
-    r = requests.get(WIKI_API, params=params, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    base = {"action": "query", "format": "json", "redirects": 1, **params}
+    out: List[Dict[str, Any]] = []
+    cont: Dict[str, Any] = {}
 
-    if "error" in data:
-        return []
+    while True:
+        data = get_json(kind, WIKI_API, {**base, **cont}, timeout=30, refresh=refresh, store=store)
+        out.append(data.get("query", {}))
+        if "continue" not in data:
+            break
+        cont = data["continue"]
 
-    links = data.get("parse", {}).get("links", [])
-    titles: List[str] = []
+    return out
 
-    for l in links:
-        # ns=0 => main article namespace
-        if l.get("ns") != 0:
-            continue
-        title = l.get("*")
-        if not title:
-            continue
-        if title in NOISE_TITLES:
-            continue
 
-        titles.append(title)
+def resolved_titles(queries: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Opgevraagde title → uiteindelijke page title.
+    Eerst "normalized" (bv. underscores/hoofdletter), daarna "redirects".
+    """
+    normalized: Dict[str, str] = {}
+    redirects: Dict[str, str] = {}
+    for query in queries:
+        normalized.update((n["from"], n["to"]) for n in query.get("normalized", []))
+        redirects.update((r["from"], r["to"]) for r in query.get("redirects", []))
+
+    def final(t: str) -> str:
+        t = normalized.get(t, t)
+        return redirects.get(t, t)
+
+    names = set(normalized) | set(normalized.values()) | set(redirects)
+    return {t: final(t) for t in names}
+
+
+def wiki_templates_links(
+    template_titles: List[str],
+    refresh: bool = False,
+    noise: Optional[set] = None,
+) -> Dict[str, List[str]]:
+    """
+    Haalt links (ns=0) uit meerdere Wikipedia templates tegelijk (prop=links).
+    Geeft {template title zoals gevraagd: [linked titles]} terug; onbekende templates => [].
+    noise=None filtert NOISE_TITLES (Oranje); geef een eigen set mee voor andere teams.
+    Let op: Wikipedia kan 403 geven zonder User-Agent.
+    """
+    noise = NOISE_TITLES if noise is None else noise
+    out: Dict[str, List[str]] = {t: [] for t in template_titles}
+
+    chunks = chunked(list(out), WIKI_MAX_TITLES)
+    results = CLIENT.map(lambda chunk: wiki_query({
+        "titles": "|".join(chunk),
+        "prop": "links",
+        "plnamespace": 0,
+        "pllimit": "max",
+    }, refresh=refresh), chunks)
+
+    for chunk, queries in zip(chunks, results):
+        links_by_page: Dict[str, List[str]] = {}
+        mapping = resolved_titles(queries)
+
+        for query in queries:
+            for _, p in query.get("pages", {}).items():
+                links = links_by_page.setdefault(p.get("title"), [])
+                links.extend(l.get("title") for l in p.get("links", []) if l.get("ns") == 0)
+
+        for t in chunk:
+            titles = links_by_page.get(mapping.get(t, t), [])
+
+            # unique + stable order, zonder ruis
+            seen = set()
+            for title in titles:
+                if not title or title in noise or title in seen:
+                    continue
+                seen.add(title)
+                out[t].append(title)
 
-    # unique + stable order
-    seen = set()
-    out: List[str] = []
-    for t in titles:
-        if t not in seen:
-            seen.add(t)
-            out.append(t)
     return out
 
 
-def build_oranje_squad_templates(from_year: int = 1990) -> List[Dict[str, Any]]:
-    world_cups = [1990, 1994, 1998, 2002, 2006, 2010, 2014, 2018, 2022]
-    euros     = [1992, 1996, 2000, 2004, 2008, 2012, 2016, 2020, 2024]
+def wiki_template_links(template_title: str) -> List[str]:
+    return wiki_templates_links([template_title])[template_title]
 
+
+def build_squad_templates(
+    team: str,
+    from_year: int = 1990,
+    catalogue: Optional[Dict[str, Any]] = None,
+    competitions: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Alle squad templates van één team volgens de catalogus.
+    competitions beperkt tot bv. ["WC"]; templates die (nog) niet bestaan
+    leveren later gewoon een lege lijst op.
+    """
+    catalogue = catalogue or load_catalogue()
+    spec = catalogue["teams"][team]
     events: List[Dict[str, Any]] = []
 
-    for y in world_cups:
-        if y < from_year:
+    for kind in spec["competitions"]:
+        if competitions and kind not in competitions:
             continue
-        events.append({
-            "kind": "WC",
-            "year": y,
-            "template": f"Template:Netherlands squad {y} FIFA World Cup",
-        })
+        comp = catalogue["competitions"][kind]
+        pattern = spec.get("templates", {}).get(kind, comp["template"])
 
-    for y in euros:
-        if y < from_year:
-            continue
-        events.append({
-            "kind": "EURO",
-            "year": y,
-            "template": f"Template:Netherlands squad UEFA Euro {y}",
-        })
+        for y in spec.get("years", {}).get(kind, comp["years"]):
+            if y < from_year:
+                continue
+            events.append({
+                "team": team,
+                "kind": kind,
+                "year": y,
+                "name": comp["name"].format(year=y),
+                "template": pattern.format(country=team_country(spec, y), year=y),
+            })
 
     return events
 
 
+def build_oranje_squad_templates(from_year: int = 1990) -> List[Dict[str, Any]]:
+    return build_squad_templates(DEFAULT_TEAM, from_year)
+
+
 # -----------------------------
 # 2) Wikipedia title → Wikidata QID (via pageprops / pageprops.wikibase_item)
 # -----------------------------
 
+def wiki_titles_to_qids(titles: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Meerdere titles in één keer → QID (max 50 per request).
+    Houdt rekening met normalized + redirects, zodat elke opgevraagde title
+    op de juiste pagina uitkomt.
+    """
+    out: Dict[str, Optional[str]] = {}
+
+    # cache per title (net als sparql_by_item per QID), alleen de missers gaan (gesorteerd) de API in
+    todo: List[str] = []
+    for t in sorted(dict.fromkeys(titles)):
+        hit = CLIENT.cached("wiki", WIKI_API, {"title": t, "prop": "wikibase_item"})
+        if hit is None:
+            todo.append(t)
+        else:
+            out[t] = hit["qid"]
+
+    def fetch(chunk: List[str]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return wiki_query({
+                "titles": "|".join(chunk),
+                "prop": "pageprops",
+                "ppprop": "wikibase_item",
+            }, store=False)
+        except OfflineCacheMiss:
+            return None
+
+    chunks = chunked(todo, WIKI_MAX_TITLES)
+    results = CLIENT.map(fetch, chunks)
+
+    offline_missing = sum(len(chunk) for chunk, queries in zip(chunks, results) if queries is None)
+    if offline_missing:
+        print(f"  (offline) {offline_missing} titles niet in cache")
+
+    for chunk, queries in zip(chunks, results):
+        if queries is None:
+            continue
+        qid_by_page: Dict[str, str] = {}
+        mapping = resolved_titles(queries)
+
+        for query in queries:
+            for _, p in query.get("pages", {}).items():
+                qid = p.get("pageprops", {}).get("wikibase_item")
+                if qid:
+                    qid_by_page[p.get("title")] = qid
+
+        for t in chunk:
+            out[t] = qid_by_page.get(mapping.get(t, t))
+            CLIENT.remember("wiki", WIKI_API, {"title": t, "prop": "wikibase_item"}, {"qid": out[t]})
+
+    return out
+
+
 def wiki_title_to_qid(title: str) -> Optional[str]:
-    params = {
-        "action": "query",
+    return wiki_titles_to_qids([title])[title]
+
+
+# -----------------------------
+# 2b) Revisie IDs (voor incrementele builds)
+# -----------------------------
+
+WD_API = "https://www.wikidata.org/w/api.php"
+
+
+def wiki_revisions(titles: List[str]) -> Dict[str, Optional[int]]:
+    """Wikipedia title → lastrevid (prop=info), max 50 per request."""
+    out: Dict[str, Optional[int]] = {}
+    chunks = chunked(list(dict.fromkeys(titles)), WIKI_MAX_TITLES)
+    results = CLIENT.map(
+        lambda chunk: wiki_query({"titles": "|".join(chunk), "prop": "info"}, kind="revisions"),
+        chunks,
+    )
+
+    for chunk, queries in zip(chunks, results):
+        mapping = resolved_titles(queries)
+        rev_by_page = {
+            p.get("title"): p.get("lastrevid")
+            for query in queries
+            for _, p in query.get("pages", {}).items()
+        }
+        for t in chunk:
+            out[t] = rev_by_page.get(mapping.get(t, t))
+
+    return out
+
+
+def wd_revisions(qids: List[str]) -> Dict[str, Optional[int]]:
+    """Wikidata QID → lastrevid (wbgetentities props=info), max 50 per request."""
+    chunks = chunked(list(dict.fromkeys(qids)), WIKI_MAX_TITLES)
+    results = CLIENT.map(lambda chunk: get_json("revisions", WD_API, {
+        "action": "wbgetentities",
         "format": "json",
-        "titles": title,
-        "prop": "pageprops",
-        "ppprop": "wikibase_item",
-        "redirects": 1,
-    }
-    r = requests.get(WIKI_API, params=params, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-
-    pages = data.get("query", {}).get("pages", {})
-    for _, p in pages.items():
-        props = p.get("pageprops", {})
-        qid = props.get("wikibase_item")
-        if qid:
-            return qid
-    return None
+        "ids": "|".join(chunk),
+        "props": "info",
+    }, timeout=30), chunks)
+
+    out: Dict[str, Optional[int]] = {}
+    for chunk, data in zip(chunks, results):
+        entities = data.get("entities", {})
+        for q in chunk:
+            out[q] = entities.get(q, {}).get("lastrevid")
+    return out
 
 
 # -----------------------------
 # 3) Wikidata SPARQL: player details + clubs with qualifiers
 # -----------------------------
 
-def sparql(query: str) -> Dict[str, Any]:
-    r = requests.get(
-        WD_SPARQL,
-        params={"format": "json", "query": query},
-        headers=HEADERS,
-        timeout=45,
-    )
-    r.raise_for_status()
-    return r.json()
+# Hoeveel QIDs per VALUES blok (wordt automatisch gehalveerd bij een timeout)
+SPARQL_CHUNK = 50
 
 
-def is_footballer(qid: str) -> bool:
+def sparql(query: str, kind: str = "sparql", refresh: bool = False, store: bool = True) -> Dict[str, Any]:
+    return get_json(kind, WD_SPARQL, sparql_params(query), timeout=45, refresh=refresh, store=store)
+
+
+def sparql_params(query: str) -> Dict[str, Any]:
+    return {"format": "json", "query": query}
+
+
+def entity_id(uri: str) -> str:
+    # "http://www.wikidata.org/entity/Q123" => "Q123"
+    return uri.rsplit("/", 1)[-1]
+
+
+def values_block(qids: List[str]) -> str:
+    return " ".join(f"wd:{q}" for q in qids)
+
+
+def sparql_timed_out(exc: Exception) -> bool:
+    """WDQS geeft bij een te zware query een timeout of 5xx terug."""
+    if isinstance(exc, requests.Timeout):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in (500, 502, 503, 504)
+    return False
+
+
+def sparql_by_item(
+    qids: List[str],
+    make_query,
+    chunk_size: Optional[int] = None,
+    kind: str = "sparql",
+    refresh: bool = False,
+    stage: str = "sparql",
+    failed: Optional[List[str]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Draait make_query(chunk) over blokken QIDs en groepeert de rows per ?item.
+    Timeout => blok halveren en opnieuw. Andere fouten => blok overslaan
+    (die QIDs krijgen dan gewoon geen rows, net als vroeger bij except Exception);
+    ze komen in REPORT.errors en, als failed een lijst is, ook in failed.
+
+    De cache werkt per QID (key = de query voor alleen die QID): eerst alle
+    QIDs in de cache opzoeken, dan alleen de missers (gesorteerd) in VALUES
+    blokken, en elke response weer per QID opslaan. Eén extra of andere QID
+    in een squad kost zo één item, niet elk blok erna.
+    """
+    out: Dict[str, List[Dict[str, Any]]] = {}
+
+    todo: List[str] = []
+    for q in sorted(dict.fromkeys(qids)):
+        hit = CLIENT.cached(kind, WD_SPARQL, sparql_params(make_query([q])), refresh=refresh)
+        if hit is None:
+            todo.append(q)
+        elif hit["results"]["bindings"]:
+            out[q] = hit["results"]["bindings"]
+    pending = chunked(todo, chunk_size or SPARQL_CHUNK)
+
+    def run(chunk: List[str]) -> Tuple[List[str], Optional[Dict[str, Any]], List[List[str]]]:
+        try:
+            return chunk, sparql(make_query(chunk), kind=kind, refresh=refresh, store=False), []
+        except Exception as e:
+            if len(chunk) > 1 and sparql_timed_out(e):
+                half = len(chunk) // 2
+                print(f"  ! SPARQL timeout bij {len(chunk)} QIDs, splitsen in {half} + {len(chunk) - half}")
+                REPORT.count(f"{stage}_splits")
+                return chunk, None, [chunk[:half], chunk[half:]]
+            print(f"  ! SPARQL faalde voor {len(chunk)} QIDs: {e}")
+            REPORT.error(stage, e, chunk)
+            if failed is not None:
+                failed.extend(chunk)
+            return chunk, None, []
+
+    # golven: alle blokken parallel, gesplitste blokken in de volgende golf
+    with REPORT.stage(stage):
+        while pending:
+            retry: List[List[str]] = []
+            for chunk, data, splits in CLIENT.map(run, pending):
+                retry.extend(splits)
+                if data is None:
+                    continue
+                by_item: Dict[str, List[Dict[str, Any]]] = {}
+                for row in data.get("results", {}).get("bindings", []):
+                    item = row.get("item", {}).get("value")
+                    if item:
+                        by_item.setdefault(entity_id(item), []).append(row)
+                for q in chunk:
+                    # ook "geen rows" onthouden (bv. geen voetballer)
+                    CLIENT.remember(kind, WD_SPARQL, sparql_params(make_query([q])),
+                                    {"results": {"bindings": by_item.get(q, [])}})
+                out.update(by_item)
+            pending = retry
+
+    return out
+
+
+def footballer_qids(
+    qids: List[str],
+    chunk_size: Optional[int] = None,
+    refresh: bool = False,
+    failed: Optional[List[str]] = None,
+) -> set:
     """
     Filter rommel (coach pages, captain page, etc.)
     We check: instance of human (Q5) AND has position (P413) OR occupation footballer (Q937857)
     """
-    q = f"""
-    SELECT ?item WHERE {{
-      VALUES ?item {{ wd:{qid} }}
-      ?item wdt:P31 wd:Q5 .
-      OPTIONAL {{ ?item wdt:P106 wd:Q937857 . }}
-      OPTIONAL {{ ?item wdt:P413 ?pos . }}
-      FILTER(BOUND(?pos) || EXISTS {{ ?item wdt:P106 wd:Q937857 }})
-    }} LIMIT 1
-    """
-    data = sparql(q)
-    bindings = data.get("results", {}).get("bindings", [])
-    return len(bindings) > 0
+    def make_query(chunk: List[str]) -> str:
+        return f"""
+        SELECT DISTINCT ?item WHERE {{
+          VALUES ?item {{ {values_block(chunk)} }}
+          ?item wdt:P31 wd:Q5 .
+          FILTER(EXISTS {{ ?item wdt:P413 ?pos }} || EXISTS {{ ?item wdt:P106 wd:Q937857 }})
+        }}
+        """
 
+    return set(sparql_by_item(qids, make_query, chunk_size, refresh=refresh, stage="footballers", failed=failed))
 
-def wd_player_details(qid: str) -> Dict[str, Any]:
-    """
-    Haalt: position, birthPlace label, birthCountry label, citizenship label.
-    """
-    q = f"""
-    SELECT
-      ?posLabel
-      ?birthPlaceLabel
-      ?birthCountryLabel
-      ?citizenshipLabel
-    WHERE {{
-      VALUES ?item {{ wd:{qid} }}
-
-      OPTIONAL {{ ?item wdt:P413 ?pos . }}
-      OPTIONAL {{ ?item wdt:P19 ?birthPlace . }}
-      OPTIONAL {{ ?birthPlace wdt:P17 ?birthCountry . }}
-      OPTIONAL {{ ?item wdt:P27 ?citizenship . }}
-
-      SERVICE wikibase:label {{
-        bd:serviceParam wikibase:language "en".
-        ?pos rdfs:label ?posLabel .
-        ?birthPlace rdfs:label ?birthPlaceLabel .
-        ?birthCountry rdfs:label ?birthCountryLabel .
-        ?citizenship rdfs:label ?citizenshipLabel .
-      }}
-    }}
-    """
-    data = sparql(q)
-    b = data.get("results", {}).get("bindings", [])
 
+def is_footballer(qid: str) -> bool:
+    return qid in footballer_qids([qid])
+
+
+def details_from_rows(b: List[Dict[str, Any]]) -> Dict[str, Any]:
     # Pak 1e resultaat (kan duplicates hebben)
     pos = None
     birth_place = None
@@ -209,9 +491,70 @@ def wd_player_details(qid: str) -> Dict[str, Any]:
         "birthCountry": birth_country_final,
     }
 
-def commons_file_url(value: Optional[str]) -> Optional[str]:
+
+def wd_players_details(
+    qids: List[str],
+    chunk_size: Optional[int] = None,
+    refresh: bool = False,
+    failed: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Haalt per QID: position, birthPlace label, birthCountry label, citizenship label.
+    """
+    def make_query(chunk: List[str]) -> str:
+        return f"""
+        SELECT
+          ?item
+          ?posLabel
+          ?birthPlaceLabel
+          ?birthCountryLabel
+          ?citizenshipLabel
+        WHERE {{
+          VALUES ?item {{ {values_block(chunk)} }}
+
+          OPTIONAL {{ ?item wdt:P413 ?pos . }}
+          OPTIONAL {{ ?item wdt:P19 ?birthPlace . }}
+          OPTIONAL {{ ?birthPlace wdt:P17 ?birthCountry . }}
+          OPTIONAL {{ ?item wdt:P27 ?citizenship . }}
+
+          SERVICE wikibase:label {{
+            bd:serviceParam wikibase:language "en".
+            ?pos rdfs:label ?posLabel .
+            ?birthPlace rdfs:label ?birthPlaceLabel .
+            ?birthCountry rdfs:label ?birthCountryLabel .
+            ?citizenship rdfs:label ?citizenshipLabel .
+          }}
+        }}
+        """
+
+    rows = sparql_by_item(qids, make_query, chunk_size, refresh=refresh, stage="details", failed=failed)
+    return {q: details_from_rows(rows.get(q, [])) for q in qids}
+
+
+def wd_player_details(qid: str) -> Dict[str, Any]:
+    return wd_players_details([qid])[qid]
+
+
+COMMONS_FILEPATH = "commons.wikimedia.org/wiki/Special:FilePath/"
+
+
+def commons_thumb_url(url: Optional[str], width: int) -> Optional[str]:
+    """
+    Special:FilePath URL → dezelfde URL met ?width=N; Commons stuurt dan een
+    verkleinde PNG (ook voor SVG) i.p.v. het originele bestand.
+    Andere URLs (bv. TSDB badges) blijven zoals ze zijn.
+    """
+    if not url or COMMONS_FILEPATH not in url:
+        return url
+    base = url.split("?", 1)[0].replace("http://", "https://", 1)
+    return f"{base}?width={int(width)}"
+
+
+def commons_file_url(value: Optional[str], width: Optional[int] = None) -> Optional[str]:
     if not value:
         return None
+    if width:
+        return commons_thumb_url(commons_file_url(value), width)
 
     v = value.strip()
 
@@ -220,7 +563,7 @@ def commons_file_url(value: Optional[str]) -> Optional[str]:
         return v
 
     # Soms zit Special:FilePath al in de string
-    if "commons.wikimedia.org/wiki/Special:FilePath/" in v:
+    if COMMONS_FILEPATH in v:
         return v
 
     # Anders: behandel als bestandsnaam
@@ -246,119 +589,377 @@ def parse_wkt_point(wkt: Optional[str]) -> Tuple[Optional[float], Optional[float
         return (None, None)
 
 
-def wd_player_clubs(qid: str) -> List[Dict[str, Any]]:
+def first_sorted(values, key=None) -> Optional[Any]:
+    """Deterministisch "beste" kandidaat: kleinste na sorteren, None als er niks is."""
+    vals = [v for v in values if v is not None]
+    if not vals:
+        return None
+    return min(vals, key=key) if key else min(vals)
+
+
+def to_year(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(value)
+    except:
+        return None
+
+
+def spells_from_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Clubs via P54 + qualifiers P580/P582.
-    Verrijkt met:
-      - stadium: club home venue (P115)
-      - coords: eerst stadion coord (P625), anders club coord (P625)
-      - clubLogo: logo image (P154), fallback image (P18) => commons url
+    Eén record per P54 statement: club QID + start/eind jaar.
+    (meerdere P580/P582 qualifiers => vroegste start, laatste eind)
     """
-    q = f"""
-    SELECT
-      ?clubLabel ?startYear ?endYear ?clubCountryLabel
-      ?venueLabel ?venueCoord ?clubCoord
-      ?logo ?image
-    WHERE {{
-      VALUES ?item {{ wd:{qid} }}
-
-      ?item p:P54 ?st .
-      ?st ps:P54 ?club .
-
-      OPTIONAL {{
-        ?st pq:P580 ?start .
-        BIND(YEAR(?start) AS ?startYear)
-      }}
-      OPTIONAL {{
-        ?st pq:P582 ?end .
-        BIND(YEAR(?end) AS ?endYear)
-      }}
-
-      OPTIONAL {{ ?club wdt:P17 ?clubCountry . }}
-
-      # stadion / home venue + coord
-      OPTIONAL {{
-        ?club wdt:P115 ?venue .
-        OPTIONAL {{ ?venue wdt:P625 ?venueCoord . }}
-      }}
-
-      # fallback club coords
-      OPTIONAL {{ ?club wdt:P625 ?clubCoord . }}
-
-      # logo / image
-      OPTIONAL {{ ?club wdt:P154 ?logo . }}
-      OPTIONAL {{ ?club wdt:P18  ?image . }}
-
-      SERVICE wikibase:label {{
-        bd:serviceParam wikibase:language "en".
-        ?club rdfs:label ?clubLabel .
-        ?clubCountry rdfs:label ?clubCountryLabel .
-        ?venue rdfs:label ?venueLabel .
-      }}
-    }}
-    """
-
-    data = sparql(q)
-    out: List[Dict[str, Any]] = []
+    by_statement: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        st = row.get("st", {}).get("value")
+        if st:
+            by_statement.setdefault(entity_id(st), []).append(row)
 
-    for row in data.get("results", {}).get("bindings", []):
-        club = row.get("clubLabel", {}).get("value")
-        start = row.get("startYear", {}).get("value")
-        end = row.get("endYear", {}).get("value")
-        club_country = row.get("clubCountryLabel", {}).get("value")
-        stadium = row.get("venueLabel", {}).get("value")
+    out: List[Dict[str, Any]] = []
 
-        if not start:
+    for statement, rs in by_statement.items():
+        start_i = first_sorted(to_year(r.get("startYear", {}).get("value")) for r in rs)
+        if start_i is None:
             continue
-        try:
-            start_i = int(start)
-        except:
+
+        ends = [to_year(r.get("endYear", {}).get("value")) for r in rs]
+        end_i = max((e for e in ends if e is not None), default=None)
+
+        club_uri = first_sorted(r.get("club", {}).get("value") for r in rs)
+        if not club_uri:
             continue
 
-        end_i: Optional[int] = None
-        if end:
-            try:
-                end_i = int(end)
-            except:
-                end_i = None
+        out.append({
+            "clubId": entity_id(club_uri),
+            "from": start_i,
+            "to": end_i,
+            # stabiel P54 statement ID, om later veilig te kunnen dedupen
+            "statement": statement,
+        })
+
+    out.sort(key=lambda x: (x["from"], x["statement"]))
+    return out
+
+
+def wd_players_clubs(
+    qids: List[str],
+    chunk_size: Optional[int] = None,
+    refresh: bool = False,
+    failed: Optional[List[str]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Clubs via P54 + qualifiers P580/P582; alleen club QID + jaren.
+    Stadion/coords/logo komen uit de ClubIndex (één keer per club).
+    """
+    def make_query(chunk: List[str]) -> str:
+        return f"""
+        SELECT ?item ?st ?club ?startYear ?endYear
+        WHERE {{
+          VALUES ?item {{ {values_block(chunk)} }}
+
+          ?item p:P54 ?st .
+          ?st ps:P54 ?club .
+
+          OPTIONAL {{
+            ?st pq:P580 ?start .
+            BIND(YEAR(?start) AS ?startYear)
+          }}
+          OPTIONAL {{
+            ?st pq:P582 ?end .
+            BIND(YEAR(?end) AS ?endYear)
+          }}
+        }}
+        """
+
+    rows = sparql_by_item(qids, make_query, chunk_size, refresh=refresh, stage="clubs", failed=failed)
+    return {q: spells_from_rows(rows.get(q, [])) for q in qids}
+
+
+def club_from_rows(club_id: str, rs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    De OPTIONALs (venue, coords, logo, image) geven per club vaak meerdere
+    rows (cartesisch product). Hier één record met een vaste keuze als er
+    meerdere kandidaten zijn.
+    """
+    def values(field: str) -> List[Optional[str]]:
+        return [r.get(field, {}).get("value") for r in rs]
+
+    # venue: liefst eentje met coords, daarna op naam
+    venues = {
+        (r.get("venueLabel", {}).get("value"), r.get("venueCoord", {}).get("value"))
+        for r in rs
+        if r.get("venueLabel")
+    }
+    venue = first_sorted(venues, key=lambda v: (v[1] is None, v[0] or "", v[1] or ""))
+    stadium, venue_wkt = venue if venue else (None, None)
 
-        # coords: eerst venueCoord, anders clubCoord
-        venue_wkt = row.get("venueCoord", {}).get("value")
-        club_wkt = row.get("clubCoord", {}).get("value")
+    # coords: eerst venueCoord, anders clubCoord
+    lat, lng = parse_wkt_point(venue_wkt) if venue_wkt else (None, None)
+    if lat is None or lng is None:
+        lat, lng = parse_wkt_point(first_sorted(values("clubCoord")))
 
-        lat, lng = parse_wkt_point(venue_wkt) if venue_wkt else (None, None)
-        if lat is None or lng is None:
-            lat, lng = parse_wkt_point(club_wkt)
+    # logo (bestandsnaam): P154, anders P18
+    logo_name = first_sorted(values("logo")) or first_sorted(values("image"))
 
-        latlng = [lat, lng] if (lat is not None and lng is not None) else None
+    return {
+        "id": club_id,
+        "club": first_sorted(values("itemLabel")),
+        "country": first_sorted(values("countryLabel")),
+        "stadium": stadium,
+        "lat": lat,
+        "lng": lng,
+        "clubLogo": commons_file_url(logo_name),
+    }
 
-        # logo (bestandsnaam)
-        logo_name = row.get("logo", {}).get("value") or row.get("image", {}).get("value")
-        club_logo_url = commons_file_url(logo_name)
 
-        out.append({
-            "club": club,
-            "from": start_i,
-            "to": end_i,
-            "country": club_country,
-            "stadium": stadium,
+def wd_clubs_info(
+    club_ids: List[str],
+    chunk_size: Optional[int] = None,
+    refresh: bool = False,
+    failed: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Club metadata per club QID:
+      - stadium: club home venue (P115)
+      - coords: eerst stadion coord (P625), anders club coord (P625)
+      - clubLogo: logo image (P154), fallback image (P18) => commons url
+    """
+    def make_query(chunk: List[str]) -> str:
+        return f"""
+        SELECT
+          ?item ?itemLabel ?countryLabel
+          ?venueLabel ?venueCoord ?clubCoord
+          ?logo ?image
+        WHERE {{
+          VALUES ?item {{ {values_block(chunk)} }}
+
+          OPTIONAL {{ ?item wdt:P17 ?country . }}
+
+          # stadion / home venue + coord
+          OPTIONAL {{
+            ?item wdt:P115 ?venue .
+            OPTIONAL {{ ?venue wdt:P625 ?venueCoord . }}
+          }}
+
+          # fallback club coords
+          OPTIONAL {{ ?item wdt:P625 ?clubCoord . }}
+
+          # logo / image
+          OPTIONAL {{ ?item wdt:P154 ?logo . }}
+          OPTIONAL {{ ?item wdt:P18  ?image . }}
+
+          SERVICE wikibase:label {{
+            bd:serviceParam wikibase:language "en".
+            ?item rdfs:label ?itemLabel .
+            ?country rdfs:label ?countryLabel .
+            ?venue rdfs:label ?venueLabel .
+          }}
+        }}
+        """
+
+    # eigen cache-soort, zodat clubs een eigen TTL / --refresh hebben
+    rows = sparql_by_item(club_ids, make_query, chunk_size, kind="sparql_clubs", refresh=refresh, stage="club_info",
+                          failed=failed)
+    # clubs uit een gefaald blok hebben geen rows en worden dus niet teruggegeven
+    return {c: club_from_rows(c, rows[c]) for c in club_ids if c in rows}
+
+
+class ClubIndex:
+    """
+    club QID → metadata (naam, land, stadion, coords, logo).
+    Elke club wordt één keer per build opgehaald, hoeveel spelers er ook voor speelden.
+    """
+
+    def __init__(self):
+        self.clubs: Dict[str, Dict[str, Any]] = {}
+        # clubs waarvan club_info in deze run faalde (en nog niet alsnog binnen zijn)
+        self.failed: set = set()
+        # welk logo spell() kiest: Commons of TheSportsDB badge (zie resolve_club_badges)
+        self.badges = "missing"
+
+    def get(self, club_id: str) -> Optional[Dict[str, Any]]:
+        return self.clubs.get(club_id)
+
+    def to_json(self) -> Dict[str, Any]:
+        return self.clubs
+
+    def load(self, data: Optional[Dict[str, Any]]) -> None:
+        self.clubs.update(data or {})
+
+    def ensure(self, club_ids: List[str], refresh: bool = False) -> None:
+        """Haalt clubs op die nog niet in de index zitten; refresh=True: ook de rest (langs de cache)."""
+        wanted = list(dict.fromkeys(club_ids))
+        missing = wanted if refresh else [c for c in wanted if c not in self.clubs]
+        if not missing:
+            return
+        now = time.time()
+        failed: List[str] = []
+        fetched = wd_clubs_info(missing, refresh=refresh, failed=failed)
+        for info in fetched.values():
+            # ophaalmoment, voor het verversen van oude clubs in --incremental
+            info["fetched"] = now
+        self.clubs.update(fetched)
+        self.failed.update(failed)
+        self.failed.difference_update(fetched)
+        what = "ververst" if refresh else "nieuwe clubs opgehaald"
+        print(f"  clubs: {len(fetched)} van {len(missing)} {what} (totaal {len(self.clubs)})")
+
+    def stale(self, max_age: Optional[float]) -> List[str]:
+        """Clubs die langer dan max_age seconden geleden zijn opgehaald (of zonder ophaalmoment)."""
+        if max_age is None:
+            return []
+        now = time.time()
+        return [c for c, info in self.clubs.items() if now - info.get("fetched", 0) > max_age]
+
+    def logo(self, info: Dict[str, Any]) -> Optional[str]:
+        """
+        clubLogo in de output. Het record zelf houdt het Commons logo én de badge,
+        zodat een volgende run met een andere --badges gewoon weer kan kiezen.
+        """
+        if self.badges == "off":
+            return info.get("clubLogo")
+        if self.badges == "all":
+            return info.get("badge") or info.get("clubLogo")
+        return info.get("clubLogo") or info.get("badge")
+
+    def spell(self, spell: Dict[str, Any]) -> Dict[str, Any]:
+        """Spell (clubId + jaren) → club object in het data.json formaat."""
+        info = self.clubs.get(spell["clubId"], {})
+        lat, lng = info.get("lat"), info.get("lng")
+        return {
+            "club": info.get("club"),
+            "from": spell["from"],
+            "to": spell["to"],
+            "country": info.get("country"),
+            "stadium": info.get("stadium"),
             "lat": lat,
             "lng": lng,
-            "latlng": latlng,
-            "clubLogo": club_logo_url,
-        })
+            "latlng": [lat, lng] if (lat is not None and lng is not None) else None,
+            "clubLogo": self.logo(info),
+            "clubId": spell["clubId"],
+            "statement": spell["statement"],
+        }
 
-    out.sort(key=lambda x: x.get("from", 0))
-    return out
+
+def wd_player_clubs(qid: str) -> List[Dict[str, Any]]:
+    index = ClubIndex()
+    spells = wd_players_clubs([qid])[qid]
+    index.ensure([sp["clubId"] for sp in spells])
+    return [index.spell(sp) for sp in spells]
+
+
+# -----------------------------
+# 3b) Club badges via TheSportsDB (vroeger in de browser, nu tijdens de build)
+# -----------------------------
+
+# free key "123"; met --tsdb-base kan er ook een lokale stand-in in
+TSDB_BASE = "https://www.thesportsdb.com/api/v1/json/123"
+
+# alias map: TSDB team naming is soms anders
+TSDB_ALIASES = {
+    "Groningen": "FC Groningen",
+    "Inter Milan": "Inter",
+    "Milan": "AC Milan",
+    "Roma": "AS Roma",
+    "Lyon": "Olympique Lyonnais",
+    "Newcastle United": "Newcastle",
+    "Manchester United": "Man United",
+    "Atlético Madrid": "Atletico Madrid",
+    "Paris Saint-Germain": "Paris SG",
+    "Fenerbahçe": "Fenerbahce",
+}
+
+BADGE_MODES = ("missing", "all", "off")
+
+
+def strip_accents(name: str) -> str:
+    # Atlético → Atletico
+    return "".join(c for c in unicodedata.normalize("NFD", name) if not unicodedata.combining(c))
+
+
+def tsdb_search_team(team_name: str) -> Optional[Dict[str, Any]]:
+    data = get_json("tsdb", f"{TSDB_BASE}/searchteams.php", {"t": team_name}, timeout=30)
+    teams = data.get("teams") or []
+    return teams[0] if teams else None
+
+
+def pick_badge(team: Optional[Dict[str, Any]]) -> Optional[str]:
+    # TSDB velden verschillen soms, dus pak de beste die beschikbaar is
+    if not team:
+        return None
+    return team.get("strTeamBadge") or team.get("strBadge") or team.get("strTeamLogo") or team.get("strLogo")
+
+
+def resolve_badge(team_name: str) -> Optional[str]:
+    """Direct, dan alias, dan zonder accenten (zelfde volgorde als de oude browser code)."""
+    candidates = [team_name]
+    if team_name in TSDB_ALIASES:
+        candidates.append(TSDB_ALIASES[team_name])
+    simplified = strip_accents(team_name)
+    if simplified != team_name:
+        candidates.append(simplified)
+
+    for name in candidates:
+        try:
+            badge = pick_badge(tsdb_search_team(name))
+        except OfflineCacheMiss:
+            return None
+        except Exception as e:
+            # bv. HTML i.p.v. JSON als TSDB stuk is
+            print(f"  ! TSDB faalde voor {name}: {e}")
+            REPORT.error("badges", e, [name])
+            continue
+        if badge:
+            return badge
+    return None
+
+
+def resolve_club_badges(clubs: "ClubIndex", mode: str = "missing") -> None:
+    """
+    Zet "badge" in de club records. mode="missing": alleen clubs zonder
+    Commons logo, "all": elke club (badge gaat dan vóór het Commons logo).
+    De keuze tussen badge en logo gebeurt pas bij het schrijven (ClubIndex.logo).
+    Alleen gevonden badges worden bewaard: misses en TSDB fouten gaan de volgende
+    run weer langs de response cache (en dus zijn TTL).
+    Lookups lopen parallel via CLIENT (rate limit per host) en de response cache.
+    """
+    clubs.badges = mode
+    if mode == "off":
+        return
+
+    todo = [
+        info for info in clubs.clubs.values()
+        if info.get("club") and not info.get("badge") and (mode == "all" or not info.get("clubLogo"))
+    ]
+    names = list(dict.fromkeys(info["club"] for info in todo))
+    with REPORT.stage("badges"):
+        badges = dict(zip(names, CLIENT.map(resolve_badge, names)))
+
+    for info in todo:
+        if badges.get(info["club"]):
+            info["badge"] = badges[info["club"]]
+
+    found = sum(1 for b in badges.values() if b)
+    print(f"  badges: {found} van {len(names)} clubs gevonden")
 
 
 # -----------------------------
 # 4) Build tournaments in jouw format
 # -----------------------------
 
-def tournament_from_key(key: str, year: int, kind: str, player_objs: List[Dict[str, Any]]) -> Dict[str, Any]:
-    name = f"FIFA World Cup {year}" if kind == "WC" else f"UEFA Euro {year}"
+def tournament_from_key(
+    key: str,
+    year: int,
+    kind: str,
+    player_objs: List[Dict[str, Any]],
+    name: Optional[str] = None,
+) -> Dict[str, Any]:
+    if name is None:
+        name = f"FIFA World Cup {year}" if kind == "WC" else f"UEFA Euro {year}"
     return {
+        "key": key,
         "year": year,
         "name": name,
         "host": None,
@@ -368,99 +969,804 @@ def tournament_from_key(key: str, year: int, kind: str, player_objs: List[Dict[s
     }
 
 
-def collect_squads(from_year: int = 1990) -> List[Tuple[str, int, str, List[str]]]:
+# full = alles opnieuw (wel via de cache), resume = verder vanaf checkpoint,
+# incremental = alleen wat volgens de revisie IDs veranderd is
+BUILD_MODES = ("full", "resume", "incremental")
+
+
+def safe_revisions(fetch, items: List[str]) -> Dict[str, Optional[int]]:
+    # revisies zijn een optimalisatie: als het misgaat bouwen we gewoon zonder
+    try:
+        return fetch(items)
+    except Exception as e:
+        print(f"  ! revisies ophalen faalde: {e}")
+        REPORT.error("revisions", e)
+        return {}
+
+
+def collect_squads(
+    from_year: int = 1990,
+    checkpoint: Optional[Checkpoint] = None,
+    mode: str = "full",
+    teams: Optional[List[str]] = None,
+    catalogue: Optional[Dict[str, Any]] = None,
+    competitions: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Returns list of (key, year, kind, titles)
+    Returns list of {team, key, year, kind, name, titles}.
+    De templates van alle teams gaan samen in dezelfde batched requests.
     """
-    events = build_oranje_squad_templates(from_year)
-    out: List[Tuple[str, int, str, List[str]]] = []
+    catalogue = catalogue or load_catalogue()
+    teams = teams or [DEFAULT_TEAM]
+    events = [e for team in teams for e in build_squad_templates(team, from_year, catalogue, competitions)]
+    templates = list(dict.fromkeys(e["template"] for e in events))
+    noise_by_team = {team: team_noise(catalogue, team) for team in teams}
+    out: List[Dict[str, Any]] = []
+
+    prev = (checkpoint.load("squads") if checkpoint and mode != "full" else None) or {}
+    revids = safe_revisions(wiki_revisions, templates)
+
+    if mode == "resume":
+        reuse = {t for t in templates if t in prev}
+    elif mode == "incremental":
+        reuse = {t for t in templates if t in prev and revids.get(t) and prev[t].get("revid") == revids[t]}
+    else:
+        reuse = set()
+
+    todo = [t for t in templates if t not in reuse]
+    try:
+        # incremental: wat veranderd is moet echt live, niet uit de cache
+        # ongefilterd opslaan; ruis verschilt per team en gaat er hieronder af
+        links = wiki_templates_links(todo, refresh=(mode == "incremental"), noise=set()) if todo else {}
+    except OfflineCacheMiss:
+        print("  (offline) templates niet in cache")
+        links = {}
+
+    state = {t: prev[t] for t in reuse}
+    for t in todo:
+        state[t] = {"revid": revids.get(t), "titles": links.get(t, [])}
+    if checkpoint:
+        checkpoint.save("squads", state)
 
     for e in events:
         key = f"{e['kind']}_{e['year']}"
-        titles = wiki_template_links(e["template"])
-        print(f"== {key} == {e['template']}")
-        print(f"  links: {len(titles)}")
-        out.append((key, e["year"], e["kind"], titles))
+        noise = noise_by_team[e["team"]]
+        titles = [t for t in state[e["template"]]["titles"] if t not in noise]
+        cached = " (checkpoint)" if e["template"] in reuse else ""
+        if titles or len(teams) == 1:
+            print(f"== {e['team']} {key} == {e['template']}{cached}")
+            print(f"  links: {len(titles)}")
+        out.append({**e, "key": key, "titles": titles})
+
+    if len(teams) > 1:
+        found = sum(1 for e in out if e["titles"])
+        print(f"  squads: {found} van {len(out)} templates gevonden ({len(teams)} teams)")
+    return out
+
+
+def resolve_qids(
+    titles: List[str],
+    checkpoint: Optional[Checkpoint] = None,
+    mode: str = "full",
+) -> Dict[str, Optional[str]]:
+    """Title → QID, met de vorige checkpoint als startpunt (resume/incremental)."""
+    qid_by_title: Dict[str, Optional[str]] = {}
+    if checkpoint and mode != "full":
+        qid_by_title.update(checkpoint.load("qids") or {})
+
+    todo = [t for t in dict.fromkeys(titles) if t not in qid_by_title]
+    try:
+        qid_by_title.update(wiki_titles_to_qids(todo))
+    except OfflineCacheMiss:
+        print("  (offline) titles niet in cache")
 
-        time.sleep(0.2)
+    if checkpoint:
+        checkpoint.save("qids", qid_by_title)
+    print(f"  QIDs: {len(todo)} titles opgezocht, {len(qid_by_title)} bekend")
+    return qid_by_title
 
+
+class PlayerStore:
+    """
+    Build-brede opslag van Wikidata personen, keyed op QID.
+    Elke persoon wordt één keer opgehaald (footballer filter, details, clubs),
+    ook als hij in meerdere toernooien zit.
+    """
+
+    def __init__(self, clubs: Optional[ClubIndex] = None):
+        # qid → record, of None als het geen voetballer is
+        self.records: Dict[str, Optional[Dict[str, Any]]] = {}
+        # qid → Wikidata lastrevid van de opgehaalde versie
+        self.revids: Dict[str, Optional[int]] = {}
+        self.clubs = clubs if clubs is not None else ClubIndex()
+
+    def __contains__(self, qid: str) -> bool:
+        return qid in self.records
+
+    def get(self, qid: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(qid)
+
+    def forget(self, qids: List[str]) -> None:
+        for q in qids:
+            self.records.pop(q, None)
+            self.revids.pop(q, None)
+
+    def club_ids(self) -> List[str]:
+        """Alle clubs waar spelers in de store ooit voor speelden."""
+        ids: Dict[str, None] = {}
+        for qid in list(self.records.keys()):
+            rec = self.records.get(qid)
+            for sp in (rec or {}).get("spells", []):
+                ids[sp["clubId"]] = None
+        return list(ids)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"records": self.records, "revids": self.revids}
+
+    def load(self, data: Optional[Dict[str, Any]]) -> None:
+        if not data:
+            return
+        self.records.update(data.get("records", {}))
+        self.revids.update(data.get("revids", {}))
+
+    def ensure(
+        self,
+        qids: List[str],
+        refresh: bool = False,
+        batch_size: Optional[int] = None,
+        on_batch=None,
+    ) -> None:
+        """
+        Haalt alleen de QIDs op die nog niet in de store zitten, in batches;
+        na elke batch wordt on_batch() aangeroepen (bv. checkpoint schrijven).
+        """
+        missing = [q for q in dict.fromkeys(qids) if q not in self.records]
+        if not missing:
+            return
+
+        with REPORT.stage("players"):
+            for batch in chunked(missing, batch_size or 2 * SPARQL_CHUNK):
+                self._fetch(batch, refresh)
+                if on_batch:
+                    on_batch()
+
+    def _fetch(self, missing: List[str], refresh: bool) -> None:
+        # QIDs waarvan een query faalde komen niet in de store (dus een
+        # volgende run / --resume probeert ze opnieuw) en staan in het rapport
+        failed: Dict[str, List[str]] = {"footballers": [], "details": [], "clubs": []}
+
+        ok = footballer_qids(missing, refresh=refresh, failed=failed["footballers"])
+        players = [q for q in missing if q in ok]
+
+        # details + clubs tegelijk
+        details_by_qid, spells_by_qid = CLIENT.map(
+            lambda job: job[0](players, refresh=refresh, failed=failed[job[1]]),
+            [(wd_players_details, "details"), (wd_players_clubs, "clubs")],
+        )
+
+        # aparte verrijkingsstap: elke club één keer
+        self.clubs.ensure([sp["clubId"] for q in players for sp in spells_by_qid[q]])
+
+        lost = {q: stage for stage, qids in failed.items() for q in qids}
+        for qid in missing:
+            if qid in lost:
+                REPORT.drop(qid, f"{lost[qid]} query faalde")
+                continue
+            if qid not in ok:
+                self.records[qid] = None
+                continue
+
+            details = details_by_qid[qid]
+            self.records[qid] = {
+                "qid": qid,
+                "position": details.get("position"),
+                "birthCountry": details.get("birthCountry"),
+                "birthPlace": details.get("birthPlace"),
+                # alleen club QID + jaren; club data komt bij het schrijven uit de ClubIndex
+                "spells": spells_by_qid[qid],
+            }
+
+        print(f"  store: {len(missing)} nieuwe QIDs opgehaald, {len(players)} spelers (totaal {len(self.records)})")
+
+
+class NdjsonPlayerStore(PlayerStore):
+    """
+    PlayerStore voor --stream: records staan in een append-only NDJSON
+    bestand (players.ndjson) i.p.v. in een dict; in het geheugen alleen
+    qid → offset. Elke batch staat meteen op schijf, de checkpoint bewaart
+    alleen nog het pad + de revids.
+    """
+
+    def __init__(self, path: str, clubs: Optional[ClubIndex] = None, reset: bool = False):
+        super().__init__(clubs)
+        self.records = NdjsonLog(path, reset=reset)
+
+    def __enter__(self) -> "NdjsonPlayerStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"ndjson": self.records.path, "revids": self.revids}
+
+    def load(self, data: Optional[Dict[str, Any]]) -> None:
+        if not data:
+            return
+        # checkpoint van een build zonder --stream: records overnemen
+        for qid, rec in data.get("records", {}).items():
+            if qid not in self.records:
+                self.records[qid] = rec
+        self.revids.update(data.get("revids", {}))
+
+    def close(self) -> None:
+        self.records.close()
+
+
+def build_data_json(
+    from_year: int = 1990,
+    store: Optional[PlayerStore] = None,
+    normalized: bool = False,
+    checkpoint: Optional[Checkpoint] = None,
+    mode: str = "full",
+    badges: str = "missing",
+) -> Dict[str, Any]:
+    """
+    Genest formaat (tournaments → players → clubs), of met normalized=True
+    de compacte tabellen uit data_format.py (incl. voorberekende kaartlagen).
+
+    Met een checkpoint wordt elke stage weggeschreven zodra hij klaar is;
+    mode="resume" gaat verder waar de vorige run stopte, mode="incremental"
+    haalt alleen squads/spelers opnieuw op waarvan de revisie veranderd is.
+    """
+    return build_teams_data(
+        [DEFAULT_TEAM], from_year, store=store, normalized=normalized,
+        checkpoint=checkpoint, mode=mode, badges=badges,
+    )[DEFAULT_TEAM]
+
+
+def build_teams_data(
+    teams: List[str],
+    from_year: int = 1990,
+    store: Optional[PlayerStore] = None,
+    normalized: bool = False,
+    checkpoint: Optional[Checkpoint] = None,
+    mode: str = "full",
+    badges: str = "missing",
+    catalogue: Optional[Dict[str, Any]] = None,
+    competitions: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Zelfde als build_data_json, maar voor meerdere teams in één run:
+    templates, titles, spelers en clubs van alle teams gaan door dezelfde
+    batches en dezelfde PlayerStore (een speler in meerdere squads wordt
+    één keer opgehaald). Geeft {team: data} terug.
+    """
+    if mode not in BUILD_MODES:
+        raise ValueError(f"onbekende mode: {mode}")
+
+    with REPORT.stage("squads"):
+        squads = collect_squads(from_year, checkpoint, mode, teams, catalogue, competitions)
+    store = store if store is not None else PlayerStore()
+    qid_by_title = fetch_players(squads, store, checkpoint, mode, badges)
+    tournaments_by_team: Dict[str, List[Dict[str, Any]]] = {team: [] for team in teams}
+
+    # clubs per speler één keer uitpakken; toernooien delen dezelfde lijst
+    clubs_by_qid: Dict[str, List[Dict[str, Any]]] = {}
+    with REPORT.stage("assemble"):
+        for sq in squads:
+            key = sq["key"]
+            if not sq["titles"]:
+                continue
+
+            print(f"== {sq['team']} {key} ==" if len(teams) > 1 else f"== {key} ==")
+            players: List[Dict[str, Any]] = []
+
+            for title, qid, rec in squad_players(sq, qid_by_title, store):
+                if qid not in clubs_by_qid:
+                    clubs_by_qid[qid] = [store.clubs.spell(sp) for sp in rec["spells"]]
+
+                players.append({
+                    "id": f"{key}-{qid}",
+                    "name": title,
+                    "position": rec["position"],
+                    "birthCountry": rec["birthCountry"],
+                    # (extra, je UI negeert dit nu, maar is handig)
+                    "birthPlace": rec["birthPlace"],
+                    "clubs": clubs_by_qid[qid],
+                })
+
+                print(f"  + {title} ({qid}) clubs={len(clubs_by_qid[qid])}")
+
+            print(f"  spelers gefilterd: {len(players)}")
+
+            tournaments_by_team[sq["team"]].append(
+                tournament_from_key(key, sq["year"], sq["kind"], players, sq.get("name"))
+            )
+
+    REPORT.count("players", len(clubs_by_qid))
+
+    out: Dict[str, Dict[str, Any]] = {}
+    with REPORT.stage("layers"):
+        for team, tournaments in tournaments_by_team.items():
+            tournaments.sort(key=lambda t: int(t["year"]))
+            data = {"tournaments": tournaments}
+            # normalized: meteen ook de kaartlagen per jaar (club-in-jaar, routes, locaties)
+            out[team] = add_year_layers(normalize_data(data)) if normalized else data
     return out
 
 
-def build_data_json(from_year: int = 1990, sleep_sparql: float = 0.25) -> Dict[str, Any]:
-    squads = collect_squads(from_year)
-    tournaments: List[Dict[str, Any]] = []
+def club_ttl() -> Optional[float]:
+    """TTL van club metadata: die van de response cache als die er is."""
+    ttls = CLIENT.cache.ttls if CLIENT.cache is not None else DEFAULT_TTLS
+    return ttls.get("sparql_clubs")
+
+
+def fetch_players(
+    squads: List[Dict[str, Any]],
+    store: PlayerStore,
+    checkpoint: Optional[Checkpoint],
+    mode: str,
+    badges: str,
+) -> Dict[str, Optional[str]]:
+    """Titles → QIDs → spelers + clubs in de store (met checkpoints). Geeft title → QID terug."""
+    if checkpoint and mode != "full":
+        store.clubs.load(checkpoint.load("clubs"))
+        store.load(checkpoint.load("players"))
+
+    def save_players() -> None:
+        if checkpoint:
+            checkpoint.save("clubs", store.clubs.to_json())
+            checkpoint.save("players", store.to_json())
+
+    # alle titles van alle squads in een paar batched requests → QID
+    all_titles = [t for sq in squads for t in sq["titles"]]
+    with REPORT.stage("qids"):
+        qid_by_title = resolve_qids(all_titles, checkpoint, mode)
+    all_qids = list(dict.fromkeys(q for q in (qid_by_title.get(t) for t in all_titles) if q))
+
+    with REPORT.stage("revisions"):
+        revids = safe_revisions(wd_revisions, all_qids)
+    if mode == "incremental":
+        changed = [q for q in all_qids if q in store and revids.get(q) and store.revids.get(q) != revids[q]]
+        print(f"  incremental: {len(changed)} van {len(all_qids)} spelers gewijzigd")
+        store.forget(changed)
+        store.ensure(changed, refresh=True, on_batch=save_players)
+
+    # elke persoon één keer voor de hele build
+    store.ensure(all_qids, on_batch=save_players)
+    for q in all_qids:
+        if revids.get(q) and q not in store.revids:
+            store.revids[q] = revids[q]
+
+    # clubs los van de spelers: incremental ververst clubs ouder dan de sparql_clubs TTL,
+    # en clubs die bij een vorige run niet opgehaald konden worden komen alsnog binnen
+    if mode == "incremental":
+        stale = store.clubs.stale(club_ttl())
+        print(f"  incremental: {len(stale)} van {len(store.clubs.clubs)} clubs ouder dan de TTL")
+        store.clubs.ensure(stale, refresh=True)
+    store.clubs.ensure(store.club_ids())
+
+    # spelers met een club die ook na een tweede poging geen data heeft: die gaan
+    # wel mee (spell zonder naam/coords), maar staan als onvolledig in het rapport
+    for q in all_qids:
+        rec = store.get(q)
+        missing = list(dict.fromkeys(
+            sp["clubId"] for sp in (rec or {}).get("spells", []) if store.clubs.get(sp["clubId"]) is None
+        ))
+        if missing:
+            failed = [c for c in missing if c in store.clubs.failed]
+            reason = "club_info query faalde" if failed else "club zonder data"
+            REPORT.degrade(q, reason, clubs=missing)
+
+    resolve_club_badges(store.clubs, badges)
+    save_players()
+
+    REPORT.count("templates", len(squads))
+    REPORT.count("templates_found", sum(1 for sq in squads if sq["titles"]))
+    REPORT.count("titles", len(set(all_titles)))
+    REPORT.count("qids", len(all_qids))
+    REPORT.count("clubs", len(store.clubs.clubs))
+    return qid_by_title
+
+
+def squad_players(
+    sq: Dict[str, Any],
+    qid_by_title: Dict[str, Optional[str]],
+    store: PlayerStore,
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """(title, qid, record) per speler in de squad die in de output komt; de rest gaat naar REPORT.dropped."""
+    seen_qids = set()
+    for title in sq["titles"]:
+        qid = qid_by_title.get(title)
+        if not qid:
+            REPORT.drop(title, "geen Wikidata item")
+            continue
+        if qid in seen_qids:
+            continue
+        seen_qids.add(qid)
 
-    for key, year, kind, titles in squads:
-        if not titles:
+        rec = store.get(qid)
+        if rec is None:
+            # niet in de store = query faalde (staat al in REPORT.dropped)
+            if qid in store:
+                REPORT.drop(qid, "geen voetballer", title=title)
             continue
+        yield title, qid, rec
 
-        players: List[Dict[str, Any]] = []
-        seen_qids = set()
 
-        for idx, title in enumerate(titles):
-            # title → qid
-            qid = wiki_title_to_qid(title)
-            time.sleep(0.1)
+# -----------------------------
+# Streaming build (--stream)
+#
+# Zelfde output als build_teams_data(normalized=True), maar spelers staan in
+# players.ndjson en elk toernooi (incl. kaartlagen) gaat meteen naar
+# tournaments.<team>.ndjson. In het geheugen blijven alleen de clubs tabel,
+# title → QID en per team de volgorde + namen van de spelers; het toernooi
+# dat gebouwd wordt is het enige volledige object.
+# -----------------------------
 
-            if not qid:
-                continue
-            if qid in seen_qids:
+class NormalizedPlayers(Mapping):
+    """qid → speler in het normalized formaat, bij elke lookup uit de store gelezen."""
+
+    def __init__(self, store: PlayerStore, names: Dict[str, str]):
+        self.store = store
+        # qid → naam, in volgorde van eerste toernooi (zoals normalize_data)
+        self.names = names
+
+    def __getitem__(self, qid: str) -> Dict[str, Any]:
+        rec = self.store.get(qid) if qid in self.names else None
+        if rec is None:
+            raise KeyError(qid)
+        return {
+            "name": self.names[qid],
+            "position": rec["position"],
+            "birthCountry": rec["birthCountry"],
+            "birthPlace": rec["birthPlace"],
+            "clubs": [[sp["clubId"], sp["from"], sp["to"]] for sp in rec["spells"]],
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def stream_team(
+    team: str,
+    squads: List[Dict[str, Any]],
+    qid_by_title: Dict[str, Optional[str]],
+    store: PlayerStore,
+    work_dir: str,
+    label: bool,
+) -> Dict[str, Any]:
+    clubs: Dict[str, Dict[str, Any]] = {}
+    names: Dict[str, str] = {}
+    players = NormalizedPlayers(store, names)
+    data = {"clubs": clubs, "players": players}
+    seq = NdjsonSeq(os.path.join(work_dir, f"tournaments.{team}.ndjson"))
+
+    def tournaments() -> Iterator[Dict[str, Any]]:
+        for sq in sorted(squads, key=lambda sq: int(sq["year"])):
+            key = sq["key"]
+            if sq["team"] != team or not sq["titles"]:
                 continue
-            seen_qids.add(qid)
 
-            # filter: only actual footballer-ish people
-            try:
-                ok = is_footballer(qid)
-            except Exception:
-                ok = False
+            print(f"== {team} {key} ==" if label else f"== {key} ==")
+            refs: List[str] = []
+            for title, qid, rec in squad_players(sq, qid_by_title, store):
+                refs.append(qid)
+                if qid in names:
+                    continue
+                names[qid] = title
+                for sp in rec["spells"]:
+                    c = store.clubs.spell(sp)
+                    if club_key(c) not in clubs:
+                        clubs[club_key(c)] = {f: c.get(f) for f in CLUB_FIELDS}
+            print(f"  spelers gefilterd: {len(refs)}")
+
+            t = tournament_from_key(key, sq["year"], sq["kind"], refs, sq.get("name"))
+            t["layers"] = year_layers(data, t)
+            yield t
+
+    with REPORT.stage("assemble"):
+        for t in tournaments():
+            seq.append(t)
 
-            time.sleep(sleep_sparql)
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "clubs": clubs,
+        "players": players,
+        "tournaments": Stream(lambda: iter(seq), len(seq)),
+    }
 
-            if not ok:
-                continue
 
-            # details
-            try:
-                details = wd_player_details(qid)
-            except Exception:
-                details = {"position": None, "birthPlace": None, "birthCountry": None}
+def build_teams_stream(
+    teams: List[str],
+    store: NdjsonPlayerStore,
+    from_year: int = 1990,
+    checkpoint: Optional[Checkpoint] = None,
+    mode: str = "full",
+    badges: str = "missing",
+    catalogue: Optional[Dict[str, Any]] = None,
+    competitions: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    build_teams_data(normalized=True) in begrensd geheugen. Geeft {team: data}
+    terug waarin players een lazy Mapping is (leest uit store) en tournaments
+    een Stream over tournaments.<team>.ndjson naast het store bestand:
+    schrijven met write_json_stream, en pas daarna store.close().
+    """
+    if mode not in BUILD_MODES:
+        raise ValueError(f"onbekende mode: {mode}")
 
-            time.sleep(sleep_sparql)
+    with REPORT.stage("squads"):
+        squads = collect_squads(from_year, checkpoint, mode, teams, catalogue, competitions)
+    work_dir = os.path.dirname(store.records.path) or "."
+    qid_by_title = fetch_players(squads, store, checkpoint, mode, badges)
 
-            # clubs
-            try:
-                clubs = wd_player_clubs(qid)
-            except Exception:
-                clubs = []
+    out = {team: stream_team(team, squads, qid_by_title, store, work_dir, len(teams) > 1) for team in teams}
+    REPORT.count("players", len({q for data in out.values() for q in data["players"]}))
+    return out
 
-            time.sleep(sleep_sparql)
 
-            players.append({
-                "id": f"{key}-{qid}",
-                "name": title,
-                "position": details.get("position"),
-                "birthCountry": details.get("birthCountry"),
-                # (extra, je UI negeert dit nu, maar is handig)
-                "birthPlace": details.get("birthPlace"),
-                "clubs": clubs,
-            })
+# -----------------------------
+# 5) Logo's: thumbnails of sprite atlas
+# -----------------------------
 
-            print(f"  + {title} ({qid}) clubs={len(clubs)}")
+LOGO_MODES = ("full", "thumb", "sprite")
 
-        print(f"  spelers gefilterd: {len(players)}")
 
-        tournaments.append(tournament_from_key(key, year, kind, players))
+def apply_logo_mode(
+    data: Dict[str, Any],
+    mode: str,
+    size: int,
+    out_dir: str,
+    cache_dir: str,
+    data_dir: str = ".",
+) -> Optional[Dict[str, Any]]:
+    """
+    Op de normalized data (clubs tabel):
+      - full:   clubLogo blijft de originele URL
+      - thumb:  Commons logo's als ?width= thumbnail (2x size voor scherpe retina markers)
+      - sprite: alle logo's in één atlas PNG in out_dir; clubs krijgen logoSprite = [x, y, w, h]
+                en data["sprites"] beschrijft de atlas, met image relatief aan data_dir
+                (de map van data.json). clubLogo blijft als fallback.
+    sprite geeft ook de sheet terug met image relatief aan out_dir (voor manifest.json).
+    """
+    if mode == "full":
+        return None
 
-    tournaments.sort(key=lambda t: int(t["year"]))
-    return {"tournaments": tournaments}
+    clubs = data.get("clubs", {})
+    if mode == "thumb":
+        for info in clubs.values():
+            info["clubLogo"] = commons_thumb_url(info.get("clubLogo"), 2 * size)
+        return None
 
+    from logo_sprites import disk_cached_loader, write_sprite_atlas
 
-if __name__ == "__main__":
-    data = build_data_json(from_year=1990)
+    # 2x zo groot ophalen als het vakje, Pillow verkleint daarna netjes
+    sources = {
+        cid: commons_thumb_url(info["clubLogo"], 2 * size)
+        for cid, info in clubs.items()
+        if info.get("clubLogo")
+    }
+    load = disk_cached_loader(lambda url: CLIENT.get_bytes(url), os.path.join(cache_dir, "logos"))
+    # vakjes indeling per atlas map, in de cache (niet mee deployen)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", os.path.normpath(out_dir)).strip("_") or "root"
+    layout_path = os.path.join(cache_dir, "logo_slots", f"{slug}.json")
+    sheet = write_sprite_atlas(sources, load, out_dir, size=2 * size, map_fn=CLIENT.map, layout_path=layout_path)
+
+    for cid, rect in sheet.pop("sprites").items():
+        clubs[cid]["logoSprite"] = rect
+    image = os.path.relpath(os.path.join(out_dir, sheet["image"]), data_dir or ".")
+    data["sprites"] = {**sheet, "image": image.replace(os.sep, "/")}
+    print(f"  {out_dir}/{sheet['image']}: {sheet['bytes'] / 1024:.0f} KB ({len(set(sources.values()))} logo's)")
+    return sheet
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Genereer data.json uit Wikipedia + Wikidata")
+    ap.add_argument("--from-year", type=int, default=1990)
+    ap.add_argument("--teams", nargs="+", default=[DEFAULT_TEAM], metavar="CODE",
+                    help="teamcodes uit de catalogus (bv. NED GER BRA) of 'all'; het eerste team "
+                         "krijgt de gewone paden, de rest <out>.<CODE>.json en <shards-dir>/<CODE>/")
+    ap.add_argument("--competitions", nargs="+", default=None, metavar="KIND",
+                    help="alleen deze toernooien (bv. WC EURO COPA)")
+    ap.add_argument("--catalogue", default=CATALOGUE_PATH, help="pad naar tournaments.json")
+    ap.add_argument("--out", default="data.json")
+    ap.add_argument("--format", choices=("normalized", "nested"), default="normalized",
+                    help="normalized = compacte tabellen (clubs/players/tournaments), nested = oude vorm")
+    ap.add_argument("--nested-out", default=None,
+                    help="schrijf daarnaast ook het oude geneste formaat (backwards compatible)")
+    ap.add_argument("--compress", nargs="*", choices=("gz", "br"), default=[],
+                    help="schrijf ook voorgecomprimeerde .gz / .br bestanden")
+    ap.add_argument("--pretty", action="store_true", help="JSON met indent=2 i.p.v. minified")
+    ap.add_argument("--stream", action="store_true",
+                    help="begrensd geheugen: spelers en toernooien via NDJSON op schijf (in de checkpoint "
+                         "map), data.json gestreamd geschreven; zelfde output, geen --pretty")
+    ap.add_argument("--shards-dir", default="data",
+                    help="map voor manifest.json + één shard per toernooi (content-hash in de naam)")
+    ap.add_argument("--no-shards", action="store_true", help="geen manifest/shards schrijven")
+    ap.add_argument("--cache", default=os.path.join(".cache", "responses.sqlite"),
+                    help="pad naar de SQLite response cache")
+    ap.add_argument("--no-cache", action="store_true", help="alles live ophalen, niks opslaan")
+    ap.add_argument("--cache-max-mb", type=int, default=200)
+    ap.add_argument("--offline", action="store_true", help="alleen uit de cache serveren, geen netwerk")
+    ap.add_argument("--refresh", nargs="*", metavar="KIND", default=None,
+                    help="cache negeren (en overschrijven); zonder argument alles, anders bv. 'wiki', 'sparql' of 'sparql_clubs'")
+    ap.add_argument("--checkpoint-dir", default=".build",
+                    help="map waar elke stage (squads, qids, players, clubs) tussentijds wordt opgeslagen")
+    ap.add_argument("--no-checkpoint", action="store_true")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="verder vanaf de laatste checkpoint")
+    mode.add_argument("--incremental", action="store_true",
+                      help="alleen squads/spelers opnieuw ophalen waarvan de revisie veranderd is")
+    ap.add_argument("--badges", choices=BADGE_MODES, default="missing",
+                    help="club badges via TheSportsDB: alleen clubs zonder logo, alle clubs, of uit")
+    ap.add_argument("--tsdb-base", default=TSDB_BASE, help="TheSportsDB API basis URL (bv. een lokale stand-in)")
+    ap.add_argument("--logos", choices=LOGO_MODES, default="thumb",
+                    help="full = originele logo URLs, thumb = Commons thumbnails, sprite = één atlas PNG")
+    ap.add_argument("--logo-size", type=int, default=34, help="weergavegrootte van een logo in px")
+    ap.add_argument("--sparql-chunk", type=int, default=SPARQL_CHUNK,
+                    help="aantal QIDs per SPARQL VALUES blok")
+    ap.add_argument("--max-in-flight", type=int, default=8,
+                    help="max aantal requests tegelijk onderweg, alle hosts samen")
+    ap.add_argument("--wiki-rate", type=float, default=10.0, help="requests/s naar en.wikipedia.org")
+    ap.add_argument("--sparql-rate", type=float, default=4.0, help="requests/s naar query.wikidata.org")
+    ap.add_argument("--report", default="build_report.json",
+                    help="timers, latency per endpoint, retries, cache hits en weggevallen spelers")
+    ap.add_argument("--no-report", action="store_true")
+    ap.add_argument("--profile", nargs="?", const="build_profile.prof", default=None, metavar="PATH",
+                    help="draai de build onder cProfile (stats naar PATH, top functies in het rapport)")
+    return ap.parse_args(argv)
+
+
+def team_paths(args: argparse.Namespace, team: str, primary: bool) -> Tuple[str, Optional[str], str]:
+    """(out, nested_out, shards_dir) voor een team; het primaire team houdt de gewone paden."""
+    if primary:
+        return args.out, args.nested_out, args.shards_dir
+
+    def suffixed(path: str) -> str:
+        stem, ext = os.path.splitext(path)
+        return f"{stem}.{team}{ext}"
+
+    nested = suffixed(args.nested_out) if args.nested_out else None
+    return suffixed(args.out), nested, os.path.join(args.shards_dir, team)
+
+
+def profile_top(profiler: cProfile.Profile, limit: int = 30) -> List[Dict[str, Any]]:
+    """Duurste functies (cumulatief) voor in build_report.json."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "own_s": round(tt, 4),
+            "cumulative_s": round(ct, 4),
+        })
+    rows.sort(key=lambda r: -r["cumulative_s"])
+    return rows[:limit]
 
-    out_path = "data.json"  # je draait script in /js, dus dit komt in js/data.json
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
 
-    print(f"✅ data.json generated: {out_path} (tournaments={len(data.get('tournaments', []))})")
+def open_cache(args: argparse.Namespace) -> Optional[ResponseCache]:
+    if args.no_cache:
+        return None
+    cache_dir = os.path.dirname(args.cache)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    return ResponseCache(
+        args.cache,
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+        offline=args.offline,
+        refresh=args.refresh or None,
+        refresh_all=args.refresh is not None and not args.refresh,
+    )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.offline and args.no_cache:
+        raise SystemExit("--offline heeft de cache nodig (haal --no-cache weg)")
+
+    CLIENT = HttpClient(
+        HEADERS,
+        report=REPORT,
+        cache=open_cache(args),
+        rates={
+            "en.wikipedia.org": (args.wiki_rate, max(1, int(args.wiki_rate))),
+            "query.wikidata.org": (args.sparql_rate, max(1, int(args.sparql_rate))),
+        },
+        max_in_flight=args.max_in_flight,
+    )
+    SPARQL_CHUNK = args.sparql_chunk
+    TSDB_BASE = args.tsdb_base.rstrip("/")
+
+    checkpoint = None if args.no_checkpoint else Checkpoint(args.checkpoint_dir)
+    build_mode = "resume" if args.resume else "incremental" if args.incremental else "full"
+    if build_mode != "full" and checkpoint is None:
+        raise SystemExit("--resume/--incremental hebben een checkpoint nodig (haal --no-checkpoint weg)")
+
+    catalogue = load_catalogue(args.catalogue)
+    teams = list(catalogue["teams"]) if args.teams == ["all"] else args.teams
+    unknown = [t for t in teams if t not in catalogue["teams"]]
+    if unknown:
+        raise SystemExit(f"onbekende teams: {' '.join(unknown)} (zie {args.catalogue})")
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    def write_main(path: str, data: Dict[str, Any]) -> List[str]:
+        if args.stream:
+            return write_json_stream(path, data, compress=args.compress)
+        return write_json(path, data, pretty=args.pretty, compress=args.compress)
+
+    # store en scratch map via de ExitStack: ook bij een mislukte build dicht en opgeruimd
+    with contextlib.ExitStack() as stack:
+        if args.stream:
+            if args.pretty:
+                print("  ! --pretty wordt genegeerd met --stream")
+            # zonder checkpoint: tijdelijke map, opgeruimd na het schrijven
+            work_dir = args.checkpoint_dir if checkpoint else stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="freethemap-"))
+            # de lazy spelers lezen tot en met het schrijven uit players.ndjson
+            stream_store = stack.enter_context(
+                NdjsonPlayerStore(os.path.join(work_dir, "players.ndjson"), reset=(build_mode == "full")))
+            results = build_teams_stream(teams, stream_store, from_year=args.from_year, checkpoint=checkpoint,
+                                         mode=build_mode, badges=args.badges, catalogue=catalogue,
+                                         competitions=args.competitions)
+        else:
+            results = build_teams_data(teams, from_year=args.from_year, normalized=True, checkpoint=checkpoint,
+                                       mode=build_mode, badges=args.badges, catalogue=catalogue,
+                                       competitions=args.competitions)
+
+        for i, (team, data) in enumerate(results.items()):
+            # je draait script in /js, dus dit komt in js/data.json
+            out_path, nested_out, shards_dir = team_paths(args, team, primary=(i == 0))
+            if not data.get("tournaments") and i > 0:
+                continue
+
+            with REPORT.stage("logos"):
+                sheet = apply_logo_mode(data, args.logos, args.logo_size, shards_dir,
+                                        os.path.dirname(args.cache) or ".", os.path.dirname(out_path) or ".")
+
+            with REPORT.stage("write"):
+                main_data = data if args.format == "normalized" else denormalize_data(data, stream=args.stream)
+                written = write_main(out_path, main_data)
+
+                if nested_out:
+                    written += write_main(nested_out, denormalize_data(data, stream=args.stream))
+
+                manifest = None
+                if not args.no_shards:
+                    manifest = write_shards(data, shards_dir, compress=args.compress, sprites=sheet)
+
+            for path in written:
+                print(f"  {path}: {os.path.getsize(path) / 1024:.0f} KB")
+            if manifest:
+                for e in manifest["tournaments"]:
+                    print(f"  {shards_dir}/{e['file']}: {e['bytes'] / 1024:.0f} KB ({e['players']} spelers)")
+            print(f"✅ data.json generated: {out_path} (tournaments={len(data.get('tournaments', []))})")
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        REPORT.extra["profile"] = {"stats": args.profile, "top": profile_top(profiler)}
+        print(f"  profiel: {args.profile} (bv. python -m pstats {args.profile})")
+
+    if not args.no_report:
+        REPORT.extra["config"] = {
+            "teams": teams,
+            "from_year": args.from_year,
+            "mode": build_mode,
+            "cache": not args.no_cache,
+            "offline": args.offline,
+            "sparql_chunk": args.sparql_chunk,
+            "max_in_flight": args.max_in_flight,
+        }
+        REPORT.write(args.report)
+        print("\n".join(REPORT.summary()))
+        print(f"  rapport: {args.report}")
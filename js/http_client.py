@@ -0,0 +1,265 @@
+import email.utils
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from build_report import BuildReport
+from response_cache import ResponseCache, OfflineCacheMiss
+
+
+# -----------------------------
+# Gedeelde HTTP client: keep-alive session, rate limit per host, retries
+# -----------------------------
+
+# host → (requests per seconde, burst)
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {
+    "en.wikipedia.org": (10.0, 10),
+    "www.wikidata.org": (10.0, 10),
+    # WDQS: max ~5 parallelle queries per IP, dus rustig aan
+    "query.wikidata.org": (4.0, 4),
+    # TheSportsDB free key: ~30 requests per minuut
+    "www.thesportsdb.com": (0.5, 2),
+}
+FALLBACK_RATE: Tuple[float, int] = (5.0, 5)
+
+# host → max aantal requests tegelijk onderweg
+DEFAULT_CONCURRENCY: Dict[str, int] = {
+    "query.wikidata.org": 3,
+    "www.thesportsdb.com": 2,
+}
+
+RETRY_STATUS = (429, 503)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """
+    Simpele token bucket (thread-safe).
+    pause_until() zet de hele bucket stil, bv. na een Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause_until(self, when: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, when)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After is óf een aantal seconden óf een HTTP datum."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+class HttpClient:
+    """
+    - één requests.Session (pooled keep-alive connecties)
+    - token bucket + max in-flight per host, plus max_in_flight voor alle hosts samen
+    - 429/503: Retry-After respecteren, anders exponentiële backoff
+    - optioneel een ResponseCache ervoor (cache hits kosten geen token)
+    - optioneel een BuildReport: latency, statussen, retries en cache hits per soort
+    """
+
+    def __init__(
+        self,
+        headers: Dict[str, str],
+        cache: Optional[ResponseCache] = None,
+        rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        report: Optional[BuildReport] = None,
+    ):
+        self.cache = cache
+        self.report = report
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self.concurrency = dict(DEFAULT_CONCURRENCY)
+        if concurrency:
+            self.concurrency.update(concurrency)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.max_in_flight)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.Semaphore] = {}
+        # over alle hosts heen; ook geneste map() pools delen deze
+        self._in_flight = threading.Semaphore(self.max_in_flight)
+
+    def _host_limits(self, host: str) -> Tuple[TokenBucket, threading.Semaphore]:
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.rates.get(host, FALLBACK_RATE)
+                self._buckets[host] = TokenBucket(rate, burst)
+                n = min(self.concurrency.get(host, self.max_in_flight), self.max_in_flight)
+                self._slots[host] = threading.Semaphore(max(1, n))
+            return self._buckets[host], self._slots[host]
+
+    def get_json(
+        self,
+        kind: str,
+        url: str,
+        params: Dict[str, Any],
+        timeout: float,
+        refresh: bool = False,
+        store: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        GET + JSON, eerst via de cache (als die er is).
+        refresh=True: cache niet lezen (wel bijwerken), behalve offline.
+        Alleen succesvolle responses worden opgeslagen (store=False: niet, bv.
+        als de aanroeper de response zelf per item in de cache zet).
+        """
+        if self.cache is not None and (not refresh or self.cache.offline):
+            hit = self.cache.get(kind, url, params)
+            if self.report:
+                self.report.cache_lookup(kind, hit is not None)
+            if hit is not None:
+                return hit
+
+        r = self._request(url, params, timeout, kind)
+        self._raise_for_status(r, kind)
+        data = r.json()
+
+        if self.cache is not None and store:
+            self.cache.put(kind, url, params, data)
+        return data
+
+    def cached(self, kind: str, url: str, params: Dict[str, Any], refresh: bool = False) -> Optional[Any]:
+        """
+        Alleen de cache, nooit het netwerk (en ook offline geen fout bij een miss).
+        Voor caches per item: wat hier mist gaat daarna gebundeld in één request.
+        """
+        if self.cache is None or (refresh and not self.cache.offline):
+            return None
+        hit = self.cache.lookup(kind, url, params)
+        if self.report:
+            self.report.cache_lookup(f"{kind}/item", hit is not None)
+        return hit
+
+    def remember(self, kind: str, url: str, params: Dict[str, Any], value: Any) -> None:
+        if self.cache is not None:
+            self.cache.put(kind, url, params, value)
+
+    def get_bytes(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 60) -> bytes:
+        """
+        Binaire GET (bv. logo's) met dezelfde rate limits en retries; geen JSON cache
+        (de aanroeper cachet zelf, zie logo_sprites.disk_cached_loader). Offline: altijd
+        OfflineCacheMiss, geen netwerk.
+        """
+        if self.cache is not None and self.cache.offline:
+            raise OfflineCacheMiss(f"bytes: {url}")
+        r = self._request(url, params or {}, timeout, "bytes")
+        self._raise_for_status(r, "bytes")
+        return r.content
+
+    def _raise_for_status(self, r: requests.Response, kind: str) -> None:
+        try:
+            r.raise_for_status()
+        except requests.HTTPError:
+            if self.report:
+                self.report.http_error(kind)
+            raise
+
+    def _request(self, url: str, params: Dict[str, Any], timeout: float, kind: str = "http") -> requests.Response:
+        host = urllib.parse.urlsplit(url).netloc
+        bucket, slots = self._host_limits(host)
+
+        attempt = 0
+        while True:
+            bucket.acquire()
+            # eerst de host, dan de globale plek: niemand houdt een globale plek
+            # vast terwijl hij op een drukke host wacht
+            with slots, self._in_flight:
+                t0 = time.perf_counter()
+                try:
+                    r = self.session.get(url, params=params, timeout=timeout)
+                except requests.ConnectionError:
+                    if self.report:
+                        self.report.request(kind, time.perf_counter() - t0, None)
+                    if attempt >= self.max_retries:
+                        if self.report:
+                            self.report.http_error(kind)
+                        raise
+                    r = None
+                except requests.Timeout:
+                    # read timeout: geen retry hier: SPARQL splitst het blok zelf bij een timeout
+                    if self.report:
+                        self.report.request(kind, time.perf_counter() - t0, None)
+                        self.report.http_error(kind)
+                    raise
+                else:
+                    if self.report:
+                        self.report.request(kind, time.perf_counter() - t0, r.status_code, len(r.content))
+
+            if r is not None and r.status_code not in RETRY_STATUS:
+                return r
+            if r is not None and attempt >= self.max_retries:
+                return r
+
+            wait = retry_after_seconds(r.headers.get("Retry-After")) if r is not None else None
+            if wait is None:
+                wait = self.backoff * (2 ** attempt)
+            # hele host even stil, niet alleen deze thread
+            bucket.pause_until(time.monotonic() + wait)
+            attempt += 1
+            if self.report:
+                self.report.retry(kind)
+
+    def map(self, fn: Callable[[T], R], items: List[T]) -> List[R]:
+        """
+        fn over items, parallel; volgorde blijft gelijk. Geneste map() calls
+        starten eigen threads, maar de requests zelf blijven begrensd door
+        max_in_flight (globaal) en de limiet per host.
+        """
+        if len(items) <= 1:
+            return [fn(x) for x in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items))) as pool:
+            return list(pool.map(fn, items))
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import json
+import math
+import os
+import re
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+# Pillow is alleen nodig voor --logos sprite (pip install Pillow)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# -----------------------------
+# Club logo's → één sprite atlas (PNG) + index met offsets
+#
+# Elk uniek logo wordt één keer gedownload (disk cache), verkleind tot een
+# vierkant vakje van size x size en in een grid geplakt. De kaart laat dan
+# één klein plaatje laden i.p.v. honderden (soms multi-MB) logo's.
+#
+# Vakjes zijn stabiel tussen builds (layout JSON in de cache map, niet naast
+# de atlas: die map wordt gedeployed): een logo houdt zijn vakje, een nieuw
+# logo krijgt het eerste vrije vakje. Zo verandert een logoSprite rect (en dus
+# een shard) alleen als dát logo verandert. Wordt de atlas veel hoger dan
+# breed (begonnen met een paar logo's, nu honderden), dan één keer opnieuw
+# indelen: liever één keer alle shards nieuw dan een PNG van tienduizenden px.
+# -----------------------------
+
+ATLAS_NAME = re.compile(r"^logos\.[0-9a-f]{10}\.png$")
+# zo heette de layout toen hij nog naast de atlas stond
+LEGACY_SLOTS_FILE = "logos.slots.json"
+# rows > MAX_ASPECT * cols => opnieuw indelen
+MAX_ASPECT = 2
+
+
+def disk_cached_loader(fetch: Callable[[str], bytes], cache_dir: str) -> Callable[[str], bytes]:
+    """
+    Loader voor build_sprite_atlas: lokale paden worden direct gelezen,
+    URLs één keer opgehaald en in cache_dir bewaard (key = sha256 van de URL).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def load(source: str) -> bytes:
+        if not source.startswith(("http://", "https://")):
+            with open(source, "rb") as f:
+                return f.read()
+
+        path = os.path.join(cache_dir, hashlib.sha256(source.encode("utf-8")).hexdigest())
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+
+        raw = fetch(source)
+        with open(path + ".tmp", "wb") as f:
+            f.write(raw)
+        os.replace(path + ".tmp", path)
+        return raw
+
+    return load
+
+
+def assign_slots(sources: List[str], previous: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    source → vakje. Bestaande sources houden hun vakje, verdwenen sources
+    geven het vrij, nieuwe (gesorteerd) vullen de laagste vrije vakjes.
+    """
+    wanted = set(sources)
+    slots = {src: i for src, i in (previous or {}).items() if src in wanted}
+    taken = set(slots.values())
+    free = (i for i in range(len(sources) + len(taken)) if i not in taken)
+    for src in sorted(wanted - set(slots)):
+        slots[src] = next(free)
+    return slots
+
+
+def build_sprite_atlas(
+    sources: Dict[str, str],
+    load: Callable[[str], bytes],
+    size: int = 64,
+    map_fn: Callable = map,
+    layout: Optional[Dict[str, Any]] = None,
+) -> Tuple[Any, Dict[str, List[int]], Dict[str, Any]]:
+    """
+    sources: key (bv. club QID) → URL of lokaal pad.
+    Geeft (atlas image, {key: [x, y, w, h]}, layout) terug. Keys met hetzelfde
+    logo delen één vakje; logo's die niet te laden zijn worden overgeslagen.
+    layout ({"size", "cols", "slots"}) van een vorige build houdt de vakjes op
+    hun plek. map_fn kan een parallelle map zijn (bv. HttpClient.map) voor het downloaden.
+    """
+    if Image is None:
+        raise RuntimeError("--logos sprite heeft Pillow nodig (pip install Pillow)")
+
+    unique = sorted(set(sources.values()))
+
+    def prepare(source: str) -> Optional[Any]:
+        try:
+            img = Image.open(io.BytesIO(load(source)))
+            img = img.convert("RGBA")
+        except Exception as e:
+            print(f"  ! logo overgeslagen ({source}): {e}")
+            return None
+        img.thumbnail((size, size), Image.LANCZOS)
+        return img
+
+    images = dict(zip(unique, map_fn(prepare, unique)))
+    usable = [s for s in unique if images[s] is not None]
+
+    def fresh() -> Dict[str, Any]:
+        return {"size": size, "cols": max(1, math.ceil(math.sqrt(len(usable)))), "slots": {}}
+
+    # andere vakjesgrootte = alles opnieuw indelen
+    if not layout or layout.get("size") != size:
+        layout = fresh()
+    slots = assign_slots(usable, layout["slots"])
+
+    def row_count(slots: Dict[str, int], cols: int) -> int:
+        return max(1, math.ceil((max(slots.values(), default=0) + 1) / cols))
+
+    if row_count(slots, layout["cols"]) > MAX_ASPECT * layout["cols"]:
+        layout = fresh()
+        slots = assign_slots(usable)
+    cols = layout["cols"]
+    rows = row_count(slots, cols)
+    atlas = Image.new("RGBA", (cols * size, rows * size), (0, 0, 0, 0))
+
+    cell: Dict[str, List[int]] = {}
+    for source in usable:
+        img, i = images[source], slots[source]
+        x = (i % cols) * size + (size - img.width) // 2
+        y = (i // cols) * size + (size - img.height) // 2
+        atlas.paste(img, (x, y))
+        cell[source] = [x, y, img.width, img.height]
+
+    index = {key: cell[src] for key, src in sources.items() if src in cell}
+    return atlas, index, {"size": size, "cols": cols, "slots": slots}
+
+
+def load_layout(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_sprite_atlas(
+    sources: Dict[str, str],
+    load: Callable[[str], bytes],
+    out_dir: str,
+    size: int = 64,
+    map_fn: Callable = map,
+    layout_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Schrijft <out_dir>/logos.<hash>.png (content-hash, dus immutable te cachen)
+    en geeft de sheet info + index terug. Oude atlassen worden opgeruimd.
+    layout_path: waar de vakjes indeling tussen builds bewaard wordt (build-intern,
+    dus niet in out_dir); zonder layout_path wordt elke build opnieuw ingedeeld.
+    """
+    atlas, index, layout = build_sprite_atlas(sources, load, size, map_fn, load_layout(layout_path))
+
+    buf = io.BytesIO()
+    atlas.save(buf, format="PNG", optimize=True)
+    raw = buf.getvalue()
+    name = f"logos.{hashlib.sha256(raw).hexdigest()[:10]}.png"
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(raw)
+
+    if layout_path:
+        if os.path.dirname(layout_path):
+            os.makedirs(os.path.dirname(layout_path), exist_ok=True)
+        with open(layout_path, "w", encoding="utf-8") as f:
+            json.dump(layout, f, ensure_ascii=False, separators=(",", ":"))
+
+    for other in os.listdir(out_dir):
+        if (ATLAS_NAME.match(other) and other != name) or other == LEGACY_SLOTS_FILE:
+            os.remove(os.path.join(out_dir, other))
+
+    return {
+        "image": name,
+        "size": size,
+        "width": atlas.width,
+        "height": atlas.height,
+        "bytes": len(raw),
+        "sprites": index,
+    }
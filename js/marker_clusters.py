@@ -0,0 +1,141 @@
+import math
+import random
+import time
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+
+# -----------------------------
+# Marker clustering per zoomband (grid in Web Mercator pixels)
+#
+# Punten die op een zoomniveau binnen hetzelfde grid-vakje van CELL_PX x CELL_PX
+# pixels vallen worden één cluster (gewogen middelpunt, opgetelde count en de
+# ids van de leden). Per band wordt geclusterd op de laagste zoom van die band,
+# dus binnen de hele band overlappen clusters niet meer dan één vakje. Boven de
+# hoogste band tekent de kaart gewoon de losse locaties.
+#
+# Standalone: geen imports uit de rest van de build.
+#   python marker_clusters.py [aantal punten]   → benchmark
+# -----------------------------
+
+TILE_SIZE = 256
+CELL_PX = 64
+MAX_LAT = 85.05112878
+
+# (minZoom, maxZoom) per band, Leaflet zoomniveaus
+ZOOM_BANDS: Tuple[Tuple[int, int], ...] = ((0, 2), (3, 4), (5, 6), (7, 8))
+
+# (id, lat, lng, gewicht)
+Point = Tuple[Any, float, float, int]
+
+
+def project(lat: float, lng: float, zoom: int) -> Tuple[float, float]:
+    """lat/lng → wereldpixels (Web Mercator, zoals Leaflet's EPSG:3857)."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    scale = TILE_SIZE * (2 ** zoom)
+    s = math.sin(math.radians(lat))
+    x = (lng + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def cluster_points(points: Sequence[Point], zoom: int, cell_px: int = CELL_PX) -> List[Dict[str, Any]]:
+    """
+    Grid clustering op één zoomniveau.
+    Geeft [{latlng, count, members}] terug, in volgorde van het eerste lid;
+    latlng is het op gewicht gemiddelde van de leden.
+    """
+    cells: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    for pid, lat, lng, weight in points:
+        x, y = project(lat, lng, zoom)
+        key = (int(x // cell_px), int(y // cell_px))
+        c = cells.get(key)
+        if c is None:
+            c = cells[key] = {"lat": 0.0, "lng": 0.0, "count": 0, "members": []}
+        w = max(1, weight)
+        c["lat"] += lat * w
+        c["lng"] += lng * w
+        c["count"] += w
+        c["members"].append(pid)
+
+    out = []
+    for c in cells.values():
+        out.append({
+            "latlng": [round(c["lat"] / c["count"], 6), round(c["lng"] / c["count"], 6)],
+            "count": c["count"],
+            "members": c["members"],
+        })
+    return out
+
+
+def cluster_bands(
+    points: Sequence[Point],
+    bands: Sequence[Tuple[int, int]] = ZOOM_BANDS,
+    cell_px: int = CELL_PX,
+) -> List[Dict[str, Any]]:
+    """
+    Clusters per zoomband: [{minZoom, maxZoom, clusters: [[lat, lng, count, [ids]]]}].
+    Compacte lijsten i.p.v. dicts, dit gaat zo de shards in.
+    """
+    out = []
+    for lo, hi in bands:
+        clusters = cluster_points(points, lo, cell_px)
+        out.append({
+            "minZoom": lo,
+            "maxZoom": hi,
+            "clusters": [[c["latlng"][0], c["latlng"][1], c["count"], c["members"]] for c in clusters],
+        })
+    return out
+
+
+def band_for_zoom(bands: Sequence[Dict[str, Any]], zoom: int) -> Optional[Dict[str, Any]]:
+    for b in bands:
+        if b["minZoom"] <= zoom <= b["maxZoom"]:
+            return b
+    return None
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def random_points(n: int, seed: int = 1) -> List[Point]:
+    """Nep-clublocaties: ~Europa, met een paar drukke stadions (veel spelers op één punt)."""
+    rng = random.Random(seed)
+    hubs = [(52.3143, 4.9419), (51.4417, 5.4675), (51.8939, 4.5232), (51.5550, -0.1083), (41.3809, 2.1228)]
+    pts: List[Point] = []
+    for i in range(n):
+        if rng.random() < 0.3:
+            lat, lng = rng.choice(hubs)
+        else:
+            lat, lng = rng.uniform(36.0, 60.0), rng.uniform(-10.0, 30.0)
+        pts.append((i, lat, lng, rng.randint(1, 5)))
+    return pts
+
+
+def benchmark(sizes: Sequence[int] = (100, 1_000, 10_000, 100_000), repeat: int = 3) -> List[Dict[str, Any]]:
+    """Beste tijd (ms) van cluster_bands over `repeat` runs, plus clusters per band."""
+    results = []
+    for n in sizes:
+        pts = random_points(n)
+        best = float("inf")
+        bands: List[Dict[str, Any]] = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            bands = cluster_bands(pts)
+            best = min(best, time.perf_counter() - t0)
+        results.append({
+            "points": n,
+            "ms": round(best * 1000, 2),
+            "clusters": {f"{b['minZoom']}-{b['maxZoom']}": len(b["clusters"]) for b in bands},
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    sizes = [int(a) for a in sys.argv[1:]] or None
+    for r in benchmark(sizes) if sizes else benchmark():
+        per_band = ", ".join(f"z{k}: {v}" for k, v in r["clusters"].items())
+        print(f"{r['points']:>8} punten  {r['ms']:>9.2f} ms  ({per_band})")
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from typing import List, Dict, Any, Iterator, Tuple
+
+
+# -----------------------------
+# Append-only NDJSON bestanden voor de streaming build
+#
+# NdjsonLog: één regel per key ({"key": .., "value": ..}), een latere regel
+# voor dezelfde key wint, {"key": .., "deleted": true} haalt hem weg. In het
+# geheugen staat alleen key → byte offset; values worden bij get() van schijf
+# gelezen. Elke regel wordt meteen geflusht, dus een ander proces (of een
+# --resume na een crash) kan het bestand tijdens de build al lezen.
+#
+# NdjsonSeq: gewoon een lijst op schijf (append + opnieuw itereren).
+# -----------------------------
+
+def dumps_line(value: Any) -> bytes:
+    return (json.dumps(value, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def scan_lines(path: str) -> Iterator[Tuple[int, Any]]:
+    """(offset, waarde) per complete regel; stopt bij een half geschreven laatste regel."""
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                return
+            yield offset, value
+            offset += len(line)
+
+
+def valid_length(path: str) -> int:
+    end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except json.JSONDecodeError:
+                break
+            end += len(line)
+    return end
+
+
+class NdjsonLog:
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        self.index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if reset and os.path.exists(path):
+            os.remove(path)
+
+        if os.path.exists(path):
+            # crash halverwege een regel: die staart weg, anders plakt de volgende append eraan vast
+            size = valid_length(path)
+            if size != os.path.getsize(path):
+                print(f"  ! {path}: onvolledige laatste regel weggehaald")
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+            for offset, row in scan_lines(path):
+                if row.get("deleted"):
+                    self.index.pop(row["key"], None)
+                else:
+                    self.index[row["key"]] = offset
+
+        self._append = open(path, "ab")
+        self._read = open(path, "rb")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def put(self, key: str, value: Any) -> None:
+        line = dumps_line({"key": key, "value": value})
+        with self._lock:
+            offset = self._append.tell()
+            self._append.write(line)
+            self._append.flush()
+            self.index[key] = offset
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key not in self.index:
+                return
+            self._append.write(dumps_line({"key": key, "deleted": True}))
+            self._append.flush()
+            del self.index[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            offset = self.index.get(key)
+            if offset is None:
+                return default
+            self._read.seek(offset)
+            return json.loads(self._read.readline())["value"]
+
+    # dict-achtig, zodat PlayerStore er gewoon zijn records in kan zetten
+    __setitem__ = put
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, default)
+        self.delete(key)
+        return value
+
+    def close(self) -> None:
+        self._append.close()
+        self._read.close()
+
+
+class NdjsonSeq:
+    """Lijst op schijf: append() tijdens de build, daarna zo vaak itereren als nodig."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "wb").close()
+
+    def append(self, value: Any) -> None:
+        with open(self.path, "ab") as f:
+            f.write(dumps_line(value))
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Any]:
+        for _, value in scan_lines(self.path):
+            yield value
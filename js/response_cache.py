@@ -0,0 +1,164 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable
+
+
+# -----------------------------
+# Persistente response cache (SQLite) voor generate_data.py
+# -----------------------------
+
+# TTL per soort request (seconden). None = nooit verlopen.
+DEFAULT_TTLS: Dict[str, Optional[float]] = {
+    "wiki": 7 * 24 * 3600,
+    "sparql": 3 * 24 * 3600,
+    # club metadata (stadion, logo, coords) verandert zelden
+    "sparql_clubs": 30 * 24 * 3600,
+    # TheSportsDB badges (ook "niet gevonden" wordt onthouden)
+    "tsdb": 30 * 24 * 3600,
+    # revisie IDs voor incrementele builds: altijd live (alleen offline uit cache)
+    "revisions": 0,
+}
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class OfflineCacheMiss(Exception):
+    """Request zit niet in de cache terwijl we in --offline draaien."""
+
+
+def _normalize_value(v: Any) -> str:
+    s = str(v)
+    # SPARQL queries: indentatie/witruimte maakt voor het resultaat niet uit
+    return " ".join(s.split())
+
+
+def cache_key(kind: str, url: str, params: Dict[str, Any]) -> str:
+    norm = sorted((str(k), _normalize_value(v)) for k, v in params.items())
+    raw = json.dumps([kind, url, norm], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Key = soort + endpoint + genormaliseerde params (of query tekst).
+    - per soort een eigen TTL
+    - grootte begrensd: oudste (laatst gebruikte) entries gaan eruit
+    - offline: alleen uit cache serveren, miss => OfflineCacheMiss
+    - refresh: cache niet lezen (wel schrijven); optioneel alleen voor bepaalde soorten
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        offline: bool = False,
+        refresh: Optional[Iterable[str]] = None,
+        refresh_all: bool = False,
+    ):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.refresh_kinds = set(refresh or [])
+        self.refresh_all = refresh_all
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+              key TEXT PRIMARY KEY,
+              kind TEXT NOT NULL,
+              url TEXT NOT NULL,
+              created REAL NOT NULL,
+              accessed REAL NOT NULL,
+              size INTEGER NOT NULL,
+              body TEXT NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _refreshing(self, kind: str) -> bool:
+        return self.refresh_all or kind in self.refresh_kinds
+
+    def get(self, kind: str, url: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Geeft de gecachte JSON terug, of None bij een miss (of verlopen entry).
+        In offline mode is een miss een fout.
+        """
+        hit = self.lookup(kind, url, params)
+        if hit is None and self.offline:
+            raise OfflineCacheMiss(f"{kind}: {url} {params}")
+        return hit
+
+    def lookup(self, kind: str, url: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Als get(), maar een miss is nooit een fout (ook offline niet)."""
+        if self._refreshing(kind) and not self.offline:
+            return None
+
+        key = cache_key(kind, url, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None:
+                created, body = row
+                ttl = self.ttls.get(kind)
+                # offline: liever verlopen data dan niks
+                if ttl is None or self.offline or now - created <= ttl:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    return json.loads(body)
+        return None
+
+    def put(self, kind: str, url: str, params: Dict[str, Any], value: Any) -> None:
+        key = cache_key(kind, url, params)
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, kind, url, created, accessed, size, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, url, now, now, len(body), body),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # LRU: oudste accessed eerst weg tot we weer onder de limiet zitten
+        cur = self._db.execute("SELECT key, size FROM responses ORDER BY accessed ASC")
+        drop = []
+        for key, size in cur:
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", drop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM responses GROUP BY kind"
+            ).fetchall()
+        return {kind: {"entries": n, "bytes": size} for kind, n, size in rows}
@@ -0,0 +1,369 @@
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Tuple
+
+from response_cache import cache_key
+
+
+# -----------------------------
+# Lokale stand-in voor Wikipedia / Wikidata / WDQS / TheSportsDB
+#
+# Eén HTTP server per endpoint (eigen poort => eigen rate limit bucket in de
+# HttpClient, net als de echte hosts). Antwoorden komen uit:
+#   1. replay: een bestaande response cache (.cache/responses.sqlite), read-only
+#   2. synthetic: deterministisch verzonnen data (zelfde seed => zelfde build)
+# Per request een instelbare latency en een kans op een 429 met Retry-After.
+#
+#   python standin_server.py --replay .cache/responses.sqlite --latency-ms 80
+# en dan generate_data.py met de URLs die hij print (bv. via bench_build.py).
+# -----------------------------
+
+# endpoint → (pad op de stand-in, echte URL voor de replay key, cache-soorten)
+ENDPOINTS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "wiki": ("/w/api.php", "https://en.wikipedia.org/w/api.php", ("wiki", "revisions")),
+    "wd": ("/w/api.php", "https://www.wikidata.org/w/api.php", ("revisions",)),
+    "sparql": ("/sparql", "https://query.wikidata.org/sparql", ("sparql", "sparql_clubs")),
+    "tsdb": ("/api/v1/json/123/searchteams.php", "https://www.thesportsdb.com/api/v1/json/123/searchteams.php", ("tsdb",)),
+}
+
+# module global in generate_data.py → endpoint + pad (zonder bestandsnaam voor TSDB_BASE)
+GLOBALS = {
+    "WIKI_API": ("wiki", "/w/api.php"),
+    "WD_API": ("wd", "/w/api.php"),
+    "WD_SPARQL": ("sparql", "/sparql"),
+    "TSDB_BASE": ("tsdb", "/api/v1/json/123"),
+}
+
+
+def stable_int(*parts: Any) -> int:
+    raw = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(raw).digest()[:8], "big")
+
+
+class Replay:
+    """Read-only opzoeken in een ResponseCache database (TTL maakt niet uit)."""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get(self, kinds: Tuple[str, ...], url: str, params: Dict[str, Any]) -> Optional[str]:
+        with self._lock:
+            for kind in kinds:
+                row = self._db.execute(
+                    "SELECT body FROM responses WHERE key = ?", (cache_key(kind, url, params),)
+                ).fetchone()
+                if row is not None:
+                    return row[0]
+        return None
+
+
+class Synthetic:
+    """
+    Verzonnen maar consistente data: squads delen spelers met het vorige
+    toernooi, spelers delen clubs uit een vaste pool, enz. Zo lijkt de
+    verhouding requests / unieke entiteiten op een echte build.
+    """
+
+    def __init__(self, seed: int = 1, squad_size: int = 23, club_pool: int = 600, missing_templates: float = 0.25):
+        self.seed = seed
+        self.squad_size = squad_size
+        self.club_pool = club_pool
+        self.missing_templates = missing_templates
+
+    # --- Wikipedia api.php ---
+
+    def _qid(self, title: str) -> str:
+        return f"Q{1_000_000 + stable_int(self.seed, 'qid', title) % 9_000_000}"
+
+    def _squad(self, template: str) -> Optional[List[str]]:
+        # "Template:<Country> squad ... <year> ..." → 23 spelers uit de pool van dat land
+        if stable_int(self.seed, "exists", template) % 1000 < self.missing_templates * 1000:
+            return None
+        m = re.match(r"Template:(.+?) squad .*?(\d{4})", template)
+        if not m:
+            return None
+        country, year = m.group(1), int(m.group(2))
+        # opeenvolgende toernooien overlappen: ~1/3 nieuwe spelers per 2 jaar
+        start = (year - 1980) * 4
+        links = [f"{country} player {start + i}" for i in range(self.squad_size)]
+        return links + [f"{country} national football team", country, "Association football"]
+
+    def wiki(self, params: Dict[str, str]) -> Dict[str, Any]:
+        titles = [t for t in params.get("titles", "").split("|") if t]
+        prop = params.get("prop")
+        normalized = []
+        pages: Dict[str, Any] = {}
+
+        for i, raw in enumerate(titles):
+            title = raw.replace("_", " ")
+            if title != raw:
+                normalized.append({"from": raw, "to": title})
+
+            if prop == "links":
+                links = self._squad(title)
+                if links is None:
+                    pages[str(-1 - i)] = {"ns": 10, "title": title, "missing": ""}
+                    continue
+                pages[str(stable_int(self.seed, "page", title) % 10**8)] = {
+                    "ns": 10,
+                    "title": title,
+                    "links": [{"ns": 0, "title": t} for t in links],
+                }
+            elif prop == "pageprops":
+                pages[str(stable_int(self.seed, "page", title) % 10**8)] = {
+                    "ns": 0,
+                    "title": title,
+                    "pageprops": {"wikibase_item": self._qid(title)},
+                }
+            else:  # info
+                pages[str(stable_int(self.seed, "page", title) % 10**8)] = {
+                    "ns": 0,
+                    "title": title,
+                    "lastrevid": stable_int(self.seed, "rev", title) % 10**9,
+                }
+
+        query: Dict[str, Any] = {"pages": pages}
+        if normalized:
+            query["normalized"] = normalized
+        return {"batchcomplete": "", "query": query}
+
+    def wd(self, params: Dict[str, str]) -> Dict[str, Any]:
+        ids = [q for q in params.get("ids", "").split("|") if q]
+        return {"entities": {q: {"id": q, "lastrevid": stable_int(self.seed, "rev", q) % 10**9} for q in ids}}
+
+    # --- WDQS ---
+
+    def sparql(self, params: Dict[str, str]) -> Dict[str, Any]:
+        query = params.get("query", "")
+        block = re.search(r"VALUES\s+\?item\s*\{([^}]*)\}", query)
+        ids = re.findall(r"wd:(Q\d+)", block.group(1)) if block else []
+        uri = lambda q: {"type": "uri", "value": f"http://www.wikidata.org/entity/{q}"}
+        lit = lambda v: {"type": "literal", "value": str(v)}
+        rows: List[Dict[str, Any]] = []
+
+        if "?venueCoord" in query:
+            for c in ids:
+                h = stable_int(self.seed, "club", c)
+                lat, lng = 36 + (h % 2400) / 100, -10 + (h // 2400 % 4000) / 100
+                rows.append({
+                    "item": uri(c),
+                    "itemLabel": lit(f"Club {c}"),
+                    "countryLabel": lit(f"Country {h % 40}"),
+                    "venueLabel": lit(f"Stadium {c}"),
+                    "venueCoord": lit(f"Point({lng:.6f} {lat:.6f})"),
+                    "logo": lit(f"http://commons.wikimedia.org/wiki/Special:FilePath/Logo%20{c}.svg"),
+                })
+        elif "?st" in query:
+            for q in ids:
+                h = stable_int(self.seed, "career", q)
+                year = 1975 + h % 35
+                for n in range(3 + h % 6):
+                    club = f"Q{2_000_000 + stable_int(self.seed, 'spell', q, n) % self.club_pool}"
+                    length = 1 + stable_int(self.seed, "len", q, n) % 5
+                    row = {
+                        "item": uri(q),
+                        "st": uri(f"{q}-{n}"),
+                        "club": uri(club),
+                        "startYear": lit(year),
+                    }
+                    if n < 2 + h % 6:
+                        row["endYear"] = lit(year + length)
+                    rows.append(row)
+                    year += length
+        elif "?posLabel" in query:
+            for q in ids:
+                h = stable_int(self.seed, "details", q)
+                rows.append({
+                    "item": uri(q),
+                    "posLabel": lit(("goalkeeper", "defender", "midfielder", "forward")[h % 4]),
+                    "birthPlaceLabel": lit(f"Town {h % 500}"),
+                    "birthCountryLabel": lit(f"Country {h % 40}"),
+                })
+        else:  # footballer filter: een paar links zijn geen speler
+            for q in ids:
+                if stable_int(self.seed, "human", q) % 20:
+                    rows.append({"item": uri(q)})
+
+        return {"head": {"vars": []}, "results": {"bindings": rows}}
+
+    # --- TheSportsDB ---
+
+    def tsdb(self, params: Dict[str, str]) -> Dict[str, Any]:
+        name = params.get("t", "")
+        if stable_int(self.seed, "tsdb", name) % 3 == 0:
+            return {"teams": None}
+        return {"teams": [{"strTeam": name, "strBadge": f"https://example.invalid/badges/{stable_int(name) % 10**6}.png"}]}
+
+
+class EndpointStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.throttled = 0
+        self.replayed = 0
+        self.synthetic = 0
+        self.missing = 0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def to_json(self) -> Dict[str, int]:
+        with self._lock:
+            return {k: getattr(self, k) for k in ("requests", "bytes", "throttled", "replayed", "synthetic", "missing")}
+
+
+class StandIn:
+    """
+    Start/stop de servers. latency_ms (+ willekeurig 0..jitter_ms) per request;
+    throttle = kans (0..1) op een 429 met Retry-After: retry_after seconden.
+    replay=None of strict=False => wat niet in de replay zit wordt verzonnen.
+    """
+
+    def __init__(
+        self,
+        replay: Optional[str] = None,
+        strict: bool = False,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        throttle: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 1,
+    ):
+        self.replay = Replay(replay) if replay else None
+        self.strict = strict
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.synthetic = Synthetic(seed)
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in ENDPOINTS}
+        self._servers: Dict[str, ThreadingHTTPServer] = {}
+        self._threads: List[threading.Thread] = []
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self.rng.random()
+
+    def respond(self, endpoint: str, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        stats = self.stats[endpoint]
+        route, real_url, kinds = ENDPOINTS[endpoint]
+        if path != route:
+            return 404, {}, b"not found"
+
+        delay = self.latency_ms + self._random() * self.jitter_ms
+        if delay:
+            time.sleep(delay / 1000)
+
+        if self.throttle and self._random() < self.throttle:
+            stats.add(requests=1, throttled=1)
+            return 429, {"Retry-After": f"{self.retry_after:g}"}, b"too many requests"
+
+        body = self.replay.get(kinds, real_url, params) if self.replay else None
+        if body is not None:
+            raw = body.encode("utf-8")
+            stats.add(requests=1, bytes=len(raw), replayed=1)
+            return 200, {"Content-Type": "application/json"}, raw
+
+        if self.strict:
+            stats.add(requests=1, missing=1)
+            return 404, {}, b"not in replay"
+
+        data = getattr(self.synthetic, endpoint)(params)
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        stats.add(requests=1, bytes=len(raw), synthetic=1)
+        return 200, {"Content-Type": "application/json"}, raw
+
+    def _handler(self, endpoint: str):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urllib.parse.urlsplit(self.path)
+                params = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+                status, headers, raw = standin.respond(endpoint, parts.path, params)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1") -> Dict[str, str]:
+        """Start één server per endpoint; geeft {WIKI_API: url, ...} voor generate_data terug."""
+        for name in ENDPOINTS:
+            server = ThreadingHTTPServer((host, 0), self._handler(name))
+            server.daemon_threads = True
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._servers[name] = server
+            self._threads.append(thread)
+        return self.urls()
+
+    def base(self, endpoint: str) -> str:
+        host, port = self._servers[endpoint].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> Dict[str, str]:
+        return {g: self.base(endpoint) + path for g, (endpoint, path) in GLOBALS.items()}
+
+    def hosts(self) -> Dict[str, str]:
+        """endpoint → netloc (voor de rate limits in HttpClient)."""
+        return {name: urllib.parse.urlsplit(self.base(name)).netloc for name in self._servers}
+
+    def stop(self) -> None:
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+
+    def reset_stats(self) -> None:
+        self.stats = {name: EndpointStats() for name in ENDPOINTS}
+
+    def stats_json(self) -> Dict[str, Dict[str, int]]:
+        return {name: s.to_json() for name, s in self.stats.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Lokale Wikipedia/Wikidata stand-in voor benchmarks")
+    ap.add_argument("--replay", default=None, help="response cache (SQLite) om antwoorden uit af te spelen")
+    ap.add_argument("--strict", action="store_true", help="niet in de replay => 404 i.p.v. verzinnen")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--throttle", type=float, default=0.0, help="kans op een 429 per request (0..1)")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    standin = StandIn(args.replay, args.strict, args.latency_ms, args.jitter_ms, args.throttle,
+                      args.retry_after, args.seed)
+    for name, url in standin.start().items():
+        print(f"  {name} = {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(standin.stats_json(), indent=2))
+        standin.stop()
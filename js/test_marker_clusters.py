@@ -0,0 +1,98 @@
+import pytest
+
+from marker_clusters import (
+    CELL_PX, MAX_LAT, TILE_SIZE, ZOOM_BANDS, band_for_zoom, cluster_bands, cluster_points, project,
+)
+
+
+# -----------------------------
+# project
+# -----------------------------
+
+def test_project_known_points():
+    assert project(0.0, 0.0, 0) == pytest.approx((128.0, 128.0))
+    assert project(0.0, -180.0, 0) == pytest.approx((0.0, 128.0))
+    assert project(0.0, 180.0, 0) == pytest.approx((256.0, 128.0))
+    # elke zoomstap verdubbelt de wereld
+    assert project(0.0, 90.0, 1) == pytest.approx((384.0, 256.0))
+
+
+def test_project_clamps_poles():
+    x, y = project(MAX_LAT, 0.0, 0)
+    assert y == pytest.approx(0.0, abs=1e-6)
+    assert project(89.9, 0.0, 0) == pytest.approx((x, y))
+    assert project(-89.9, 0.0, 3)[1] == pytest.approx(TILE_SIZE * 2 ** 3, abs=1e-6)
+
+
+# -----------------------------
+# cluster_points
+# -----------------------------
+
+def test_cluster_points_groups_per_cell_with_weighted_centre():
+    points = [
+        ("ajax", 52.0, 4.0, 1),
+        ("far", -30.0, 150.0, 2),
+        ("psv", 52.0, 5.0, 3),
+    ]
+    clusters = cluster_points(points, zoom=0)
+
+    # volgorde van het eerste lid
+    assert [c["members"] for c in clusters] == [["ajax", "psv"], ["far"]]
+    near, far = clusters
+    assert near["count"] == 4
+    assert near["latlng"] == [52.0, 4.75]
+    assert far["count"] == 2
+    assert far["latlng"] == [-30.0, 150.0]
+
+
+def test_cluster_points_splits_on_cell_edge():
+    # x = 63.9 en 64.1 px op zoom 0: net aan weerszijden van de eerste vakjesgrens
+    lng_left = 63.9 / TILE_SIZE * 360.0 - 180.0
+    lng_right = 64.1 / TILE_SIZE * 360.0 - 180.0
+    clusters = cluster_points([("a", 0.0, lng_left, 1), ("b", 0.0, lng_right, 1)], zoom=0)
+    assert [c["members"] for c in clusters] == [["a"], ["b"]]
+    # een grotere cel pakt ze wel samen
+    assert len(cluster_points([("a", 0.0, lng_left, 1), ("b", 0.0, lng_right, 1)], 0, 2 * CELL_PX)) == 1
+
+
+def test_cluster_points_weight_at_least_one():
+    (c,) = cluster_points([("a", 10.0, 10.0, 0), ("b", 10.0, 10.0, -3)], zoom=5)
+    assert c["count"] == 2
+    assert c["latlng"] == [10.0, 10.0]
+
+
+# -----------------------------
+# cluster_bands / band_for_zoom
+# -----------------------------
+
+def test_cluster_bands_shape_and_order():
+    points = [("a", 52.0, 4.0, 1), ("b", 52.0, 5.0, 3), ("c", 48.0, 2.0, 1)]
+    bands = cluster_bands(points)
+
+    assert [(b["minZoom"], b["maxZoom"]) for b in bands] == list(ZOOM_BANDS)
+    for b in bands:
+        assert set(b) == {"minZoom", "maxZoom", "clusters"}
+        for lat, lng, count, members in b["clusters"]:
+            assert isinstance(lat, float) and isinstance(lng, float)
+            assert count >= len(members) >= 1
+        # alle punten zitten in precies één cluster per band
+        assert sorted(m for cl in b["clusters"] for m in cl[3]) == ["a", "b", "c"]
+
+    # verder inzoomen = nooit minder clusters
+    sizes = [len(b["clusters"]) for b in bands]
+    assert sizes == sorted(sizes)
+    # band clustert op zijn laagste zoom
+    assert bands[1]["clusters"] == [
+        [c["latlng"][0], c["latlng"][1], c["count"], c["members"]] for c in cluster_points(points, 3)
+    ]
+
+
+def test_band_for_zoom_edges():
+    bands = cluster_bands([("a", 52.0, 4.0, 1)])
+    assert band_for_zoom(bands, 0)["minZoom"] == 0
+    assert band_for_zoom(bands, 2)["maxZoom"] == 2
+    assert band_for_zoom(bands, 3)["minZoom"] == 3
+    assert band_for_zoom(bands, 8)["maxZoom"] == 8
+    assert band_for_zoom(bands, 9) is None
+    assert band_for_zoom(bands, 18) is None
+    assert band_for_zoom([], 0) is None
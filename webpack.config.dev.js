@@ -11,15 +11,6 @@ module.exports = merge(common, {
     liveReload: true,
     open: true,
     static: [{ directory: __dirname }],
-    proxy: [
-      {
-        context: ["/tsdb"],
-        target: "https://www.thesportsdb.com",
-        changeOrigin: true,
-        secure: true,
-        pathRewrite: { "^/tsdb": "" },
-      },
-    ],
   },
   plugins: [
     new CopyPlugin({
@@ -27,6 +18,7 @@ module.exports = merge(common, {
         { from: "css", to: "css" },
         { from: "img", to: "img" },
         { from: "js/data.json", to: "js/data.json", noErrorOnMissing: true },
+        { from: "js/data", to: "js/data", noErrorOnMissing: true },
         { from: "js/vendor", to: "js/vendor" },
         { from: "icon.svg", to: "icon.svg" },
         { from: "favicon.ico", to: "favicon.ico" },
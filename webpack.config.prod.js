@@ -10,6 +10,7 @@ module.exports = merge(common, {
         { from: "css", to: "css" },
         { from: "img", to: "img" },
         { from: "js/data.json", to: "js/data.json" }, // ✅ nodig voor je fetch
+        { from: "js/data", to: "js/data", noErrorOnMissing: true }, // manifest + shards
         { from: "js/vendor", to: "js/vendor" },
         { from: "icon.svg", to: "icon.svg" },
         { from: "favicon.ico", to: "favicon.ico" },